@@ -3,11 +3,14 @@ from django_filters import rest_framework as filters
 
 from movies.models import Genre
 from movies.serializers import GenreSerializer
+from api.v1.mixins import CachedResponseMixin, ConditionalGetMixin
 from api.v1.titles.pagination import TitleSetPagination
 from .filters import GenreFilterSet
 
 
-class GenreListView(generics.ListAPIView):
+class GenreListView(
+    ConditionalGetMixin, CachedResponseMixin, generics.ListAPIView
+):
     """
     This endpoint is the entry point of the **OCMovies API** to browse the
     available genres.
@@ -19,6 +22,7 @@ class GenreListView(generics.ListAPIView):
     """
 
     http_method_names = ['get']
+    case_sensitive_params = ['name']
     queryset = Genre.objects.order_by('name')
     serializer_class = GenreSerializer
     filter_backends = [filters.DjangoFilterBackend]
@@ -0,0 +1,148 @@
+"""Implementation of the API views mixins.
+
+This module is part of the OCMovies-API project and implements mixins shared
+by the API views, e.g. to cache their responses or answer conditional
+requests until a new version of the movies dataset is loaded by the
+create_db command.
+
+"""
+
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from movies.models import Dataset
+
+DATASET_KEY = 'dataset'
+
+
+def get_api_cache():
+    """Returns the cache holding the responses of the API views."""
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_dataset():
+    """Returns the row describing the current dataset version, read from the
+    database at most once every API_DATASET_VERSION_TIMEOUT seconds."""
+    cache = get_api_cache()
+    dataset = cache.get(DATASET_KEY)
+    if dataset is None:
+        dataset = Dataset.objects.current()
+        cache.set(DATASET_KEY, dataset, settings.API_DATASET_VERSION_TIMEOUT)
+    return dataset
+
+
+def get_dataset_cache_key(kind, text):
+    """Returns the key of a cache entry of the given kind describing text,
+    for the current dataset version."""
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return f'{kind}:{get_dataset().tag}:{digest}'
+
+
+class ConditionalGetMixin:
+    """Answers the GET requests of a view with strong ETag and Last-Modified
+    headers derived from the dataset version.
+
+    Requests whose If-None-Match or If-Modified-Since headers match the
+    current dataset version are answered with 304 Not Modified before any
+    query on the movies or any serialization.
+    """
+
+    def get(self, request, *args, **kwargs):
+        dataset = get_dataset()
+        etag = self.get_etag(request, dataset)
+        last_modified = int(dataset.updated_at.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    def get_etag(self, request, dataset):
+        """Returns the strong ETag of the response to a request, which
+        depends on the dataset version, the url including its scheme, since
+        the responses hold absolute urls, and the negotiated media type."""
+        representation = (
+            f'{dataset.tag} {request.build_absolute_uri()} '
+            f'{request.accepted_media_type}'
+        )
+        digest = hashlib.sha256(representation.encode('utf-8')).hexdigest()
+        return f'"{digest}"'
+
+
+class CachedResponseMixin:
+    """Caches the data of the successful GET responses of a view.
+
+    The cache key is made of the dataset version, the scheme, the host, the
+    path and the canonical form of the query string, so that equivalent
+    queries share the same entry and the entries of a previous dataset are
+    never served. The scheme is part of the key because the cached data holds
+    absolute urls.
+    """
+
+    # Query parameters whose values are matched case sensitively by the
+    # filters, and thus not lower-cased in the cache key
+    case_sensitive_params = ()
+
+    def get(self, request, *args, **kwargs):
+        cache = get_api_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data)
+        return response
+
+    def get_cache_key(self, request):
+        """Returns the cache key of the response to a request."""
+        url = (
+            f'{request.build_absolute_uri(request.path)}?'
+            f'{self.get_canonical_query(request)}'
+        )
+        return get_dataset_cache_key('response', url)
+
+    def get_canonical_query(self, request):
+        """Returns the query string of a request with its parameters sorted
+        by name, their values lower-cased and the page size clamped as done
+        by the paginator."""
+        return urlencode(self.get_canonical_params(request))
+
+    def get_canonical_params(self, request):
+        """Returns the (name, value) pairs of the canonical query string of a
+        request."""
+        size_param = getattr(self.paginator, 'page_size_query_param', None)
+        params = []
+        for name in sorted(request.query_params):
+            values = request.query_params.getlist(name)
+            if name == size_param:
+                values = self.get_canonical_page_size(values[-1])
+            elif name not in self.case_sensitive_params:
+                values = [value.lower() for value in values]
+            params.extend((name, value) for value in values)
+        return params
+
+    def get_canonical_page_size(self, value):
+        """Returns the page size actually used by the paginator for a
+        page_size parameter, or no value if it is the default size."""
+        try:
+            size = int(value)
+        except ValueError:
+            return []
+        if self.paginator.max_page_size:
+            size = min(size, self.paginator.max_page_size)
+        if size <= 0 or size == self.paginator.page_size:
+            return []
+        return [str(size)]
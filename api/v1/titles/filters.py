@@ -1,6 +1,92 @@
+import re
+
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.text import capfirst
 from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
+from rest_framework.exceptions import ValidationError
+
+from movies import bitmaps, columns
+from movies.models import SORTABLE_FIELDS, Movie, fold_name
+from movies.sqlite import is_sqlite
+
+
+class RelatedFilter(filters.CharFilter):
+    """Filters the movies on a lookup of a related entity, e.g. the name of
+    their genres.
+
+    Many to many relations are tested with a subquery selecting the matching
+    movie ids from the through table rather than with a join, so that
+    combining several filters never multiplies the movie rows and every
+    movie is returned and counted once.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        field = qs.model._meta.get_field(self.field_name)
+        if not field.many_to_many:
+            return super().filter(qs, value)
+        through = field.remote_field.through
+        movie = through._meta.get_field(field.m2m_field_name())
+        related = through._meta.get_field(field.m2m_reverse_field_name())
+        movie_ids = through.objects.filter(
+            self.get_related_condition(related, value)
+        ).values(movie.attname)
+        return qs.filter(pk__in=movie_ids)
+
+    def get_related_condition(self, related, value):
+        """Returns the condition selecting the through table rows of the
+        related entities matching value, related being the foreign key of the
+        through table to these entities."""
+        return Q(**{f'{related.name}__{self.lookup_expr}': value})
+
+
+class NameFilter(RelatedFilter):
+    """Filters the movies on the exact name of a related entity regardless
+    of case and accents, through the indexed name key of the entity."""
+
+    def __init__(self, field_name=None, **kwargs):
+        kwargs.setdefault('label', f'{capfirst(field_name)} name')
+        super().__init__(
+            field_name=field_name, lookup_expr='name_key', **kwargs
+        )
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        return super().filter(qs, fold_name(value))
+
+
+class ContributorContainsFilter(RelatedFilter):
+    """Filters the movies on a substring of the names of their contributors
+    in one role, e.g. their directors.
+
+    On SQLite, substrings of at least three characters are looked up in the
+    trigram index of the contributor names rather than by scanning the names
+    of the contributors.
+    """
+
+    min_indexed_length = 3
+
+    def __init__(self, field_name=None, **kwargs):
+        super().__init__(
+            field_name=field_name, lookup_expr='name__icontains', **kwargs
+        )
 
-from movies.models import Movie
+    def get_related_condition(self, related, value):
+        if not is_sqlite() or len(value) < self.min_indexed_length:
+            return super().get_related_condition(related, value)
+        # the index is a virtual table unknown to the ORM, whose rowid is the
+        # contributor id, queried with the value as a quoted phrase
+        return Q(**{
+            f'{related.attname}__in': RawSQL(
+                'SELECT rowid FROM movies_contributor_fts '
+                'WHERE movies_contributor_fts MATCH %s',
+                ['"{}"'.format(value.replace('"', '""'))],
+            )
+        })
 
 
 class TitleFilterSet(filters.FilterSet):
@@ -17,49 +103,33 @@ class TitleFilterSet(filters.FilterSet):
     title_contains = filters.CharFilter(
         field_name="title", lookup_expr='icontains'
     )
-    director = filters.CharFilter(
-        field_name="directors", lookup_expr='name__iexact'
+    q = filters.CharFilter(
+        method='filter_q',
+        label="Full-text search in titles and descriptions",
     )
-    director_contains = filters.CharFilter(
-        field_name="directors", lookup_expr='name__icontains'
-    )
-    writer = filters.CharFilter(
-        field_name="writers", lookup_expr='name__iexact'
-    )
-    writer_contains = filters.CharFilter(
-        field_name="writers", lookup_expr='name__icontains'
-    )
-    actor = filters.CharFilter(field_name="actors", lookup_expr='name__iexact')
-    actor_contains = filters.CharFilter(
-        field_name="actors", lookup_expr='name__icontains'
-    )
-    genre = filters.CharFilter(field_name="genres", lookup_expr='name__iexact')
-    genre_contains = filters.CharFilter(
+    director = NameFilter(field_name="directors")
+    director_contains = ContributorContainsFilter(field_name="directors")
+    writer = NameFilter(field_name="writers")
+    writer_contains = ContributorContainsFilter(field_name="writers")
+    actor = NameFilter(field_name="actors")
+    actor_contains = ContributorContainsFilter(field_name="actors")
+    genre = NameFilter(field_name="genres")
+    genre_contains = RelatedFilter(
         field_name="genres", lookup_expr='name__icontains'
     )
-    country = filters.CharFilter(
-        field_name="countries", lookup_expr='name__iexact'
-    )
-    country_contains = filters.CharFilter(
+    country = NameFilter(field_name="countries")
+    country_contains = RelatedFilter(
         field_name="countries", lookup_expr='name__icontains'
     )
-    lang = filters.CharFilter(
-        field_name="languages", lookup_expr='name__iexact'
-    )
-    lang_contains = filters.CharFilter(
+    lang = NameFilter(field_name="languages")
+    lang_contains = RelatedFilter(
         field_name="languages", lookup_expr='name__icontains'
     )
-    company = filters.CharFilter(
-        field_name="company", lookup_expr='name__iexact'
-    )
+    company = NameFilter(field_name="company")
     company_contains = filters.CharFilter(
         field_name="company", lookup_expr='name__icontains'
     )
-    rating = filters.CharFilter(
-        field_name="rated",
-        lookup_expr='name__iexact',
-        label='Movie rating name',
-    )
+    rating = NameFilter(field_name="rated", label='Movie rating name')
     rating_contains = filters.CharFilter(
         field_name="rated",
         lookup_expr='name__icontains',
@@ -70,9 +140,119 @@ class TitleFilterSet(filters.FilterSet):
         label="Sort by a given value (title, -title, -imdb_score, etc.)",
     )
 
+    def filter_q(self, queryset, name, value):
+        """Keeps the movies whose titles or descriptions contain words
+        starting with each word of value, regardless of case and accents,
+        best matches first."""
+        words = re.findall(r'\w+', value)
+        if not words:
+            return queryset.none()
+        if not is_sqlite():
+            for word in words:
+                queryset = queryset.filter(
+                    Q(title__icontains=word)
+                    | Q(original_title__icontains=word)
+                    | Q(description__icontains=word)
+                    | Q(long_description__icontains=word)
+                )
+            return queryset
+        # the full-text index is a virtual table unknown to the ORM, joined
+        # on its rowid which is the movie id
+        return queryset.extra(
+            tables=['movies_movie_fts'],
+            where=[
+                'movies_movie_fts.rowid = movies_movie.id',
+                'movies_movie_fts MATCH %s',
+            ],
+            params=[' '.join(f'"{word}"*' for word in words)],
+            order_by=['movies_movie_fts.rank'],
+        )
+
     def filter_sort_by(self, queryset, name, value):
-        values = value.lower().split(',')
-        return queryset.order_by(*values)
+        """Sorts the movies by a comma-separated list of sortable fields,
+        each one prefixed with '-' for a descending order."""
+        return queryset.order_by(*self.get_sort_keys(name, value))
+
+    @staticmethod
+    def get_sort_keys(name, value):
+        """Returns the order_by keys of a sort_by value, rejecting the fields
+        which are not sortable.
+
+        The id is added as a last key in the direction of the previous one, so
+        that sorting on a single field scans its (field, id) index forwards or
+        backwards instead of sorting the filtered movies.
+        """
+        keys = [key.strip() for key in value.lower().split(',')]
+        fields = [key.removeprefix('-') for key in keys]
+        invalid = [
+            key for key, field in zip(keys, fields)
+            if field not in [*SORTABLE_FIELDS, 'id']
+        ]
+        if invalid:
+            raise ValidationError({
+                name: f'Cannot sort by {", ".join(invalid)}, the sortable '
+                      f'fields are {", ".join(SORTABLE_FIELDS)}.'
+            })
+        if 'id' not in fields:
+            keys.append('-id' if keys[-1].startswith('-') else 'id')
+        return keys
+
+    def get_bitmap_ids(self, tag):
+        """Returns the ids of the filtered movies read from the bitmap index
+        of the dataset version identified by tag, or None unless the active
+        filters are all exact name filters on indexed relations."""
+        conditions = {}
+        for name, value in self.form.cleaned_data.items():
+            if value in EMPTY_VALUES:
+                continue
+            filter_ = self.filters[name]
+            if (
+                not isinstance(filter_, NameFilter)
+                or filter_.field_name not in bitmaps.INDEXED_RELATIONS
+            ):
+                return None
+            conditions[filter_.field_name] = fold_name(value)
+        if not conditions:
+            return None
+        return bitmaps.get_index(tag).select(conditions)
+
+    def get_column_ids(self, tag):
+        """Returns the ids of the filtered and sorted movies read from the
+        columnar snapshot of the dataset version identified by tag, or None
+        unless the active filters and sort keys are all on fields of the
+        snapshot.
+
+        Requests without a range filter are left to SQL, which reads their
+        pages from the (field, id) indexes of the sortable fields."""
+        conditions = []
+        keys = [('id', False)]
+        for name, value in self.form.cleaned_data.items():
+            if value in EMPTY_VALUES:
+                continue
+            filter_ = self.filters[name]
+            if name == 'sort_by':
+                keys = [
+                    (key.removeprefix('-'), key.startswith('-'))
+                    for key in self.get_sort_keys(name, value)
+                ]
+                if not all(
+                    field in columns.SNAPSHOT_FIELDS or field == 'id'
+                    for field, _ in keys
+                ):
+                    return None
+            elif (
+                isinstance(filter_, filters.NumberFilter)
+                and filter_.field_name in columns.SNAPSHOT_FIELDS
+                and filter_.lookup_expr in columns.LOOKUPS
+            ):
+                conditions.append(
+                    (filter_.field_name, filter_.lookup_expr, value)
+                )
+            else:
+                return None
+        if not conditions:
+            return None
+        return columns.get_columns(tag).select(conditions, keys)
 
     class Meta:
         model = Movie
@@ -85,6 +265,7 @@ class TitleFilterSet(filters.FilterSet):
             'imdb_score_max',
             'title',
             'title_contains',
+            'q',
             'genre',
             'genre_contains',
             'sort_by',
@@ -1,7 +1,321 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+from functools import reduce
+import operator
+from urllib.parse import urlencode
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import (
+    EmptyPage,
+    InvalidPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from api.v1.mixins import get_api_cache, get_dataset_cache_key
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator reading the number of items from the API cache, where it is
+    stored under cache_key after being counted once."""
+
+    def __init__(self, object_list, per_page, cache_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return self.object_list.count()
+        cache = get_api_cache()
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(self.cache_key, count)
+        return count
+
+
+class UncountedPage(Page):
+    """Page of an UncountedPaginator, which knows whether a next page
+    exists."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class UncountedPaginator(Paginator):
+    """Paginator which never counts the items, and detects whether a next
+    page exists by fetching one item more than the page size."""
+
+    count = None
+    num_pages = None
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        items = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not items and number > 1:
+            raise EmptyPage('That page contains no results')
+        return UncountedPage(
+            items[:self.per_page],
+            number,
+            self,
+            has_next=len(items) > self.per_page,
+        )
 
 
 class TitleSetPagination(PageNumberPagination):
+    """Page number pagination whose counts are cached per set of filters
+    and dataset version, and skipped on requests with count=false."""
+
     page_size = 5
     page_size_query_param = 'page_size'
-    max_page_size = 50
\ No newline at end of file
+    max_page_size = 50
+    count_query_param = 'count'
+
+    # Query parameters which do not change the set of paginated items
+    pagination_params = [
+        'page', 'page_size', 'count', 'pagination', 'cursor', 'format'
+    ]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+
+        if self.is_counted(request):
+            paginator = CachedCountPaginator(
+                queryset, page_size, self.get_count_cache_key(request, view)
+            )
+        else:
+            paginator = UncountedPaginator(queryset, page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        if (
+            paginator.num_pages is not None
+            and paginator.num_pages > 1
+            and self.template is not None
+        ):
+            # The browsable API should display pagination controls.
+            self.display_page_controls = True
+        return list(self.page)
+
+    def is_counted(self, request):
+        """Tells whether the items are counted, i.e. unless the request
+        has count=false."""
+        value = request.query_params.get(self.count_query_param, 'true')
+        return value.lower() not in ('false', '0', 'no')
+
+    def get_count_cache_key(self, request, view):
+        """Returns the cache key of the number of items of a request, made of
+        the path and the canonical filters of the request, or None if the
+        view does not provide canonical parameters."""
+        get_params = getattr(view, 'get_canonical_params', None)
+        if get_params is None:
+            return None
+        params = [
+            (name, value)
+            for name, value in get_params(request)
+            if name not in self.pagination_params
+        ]
+        return get_dataset_cache_key(
+            'count', f'{request.path}?{urlencode(params)}'
+        )
+
+
+class TitleCursorPagination(BasePagination):
+    """Keyset pagination of the movie ids, used with pagination=cursor.
+
+    The page following a cursor is selected with a condition on the values of
+    the ordering fields of the last movie seen, rather than with an offset,
+    so the cost of a page does not depend on its depth and no count is run.
+    The ordering may use any concrete field of the movies, the id being added
+    as a tie-breaker, and null values sort as the smallest values.
+    """
+
+    page_size = TitleSetPagination.page_size
+    page_size_query_param = TitleSetPagination.page_size_query_param
+    max_page_size = TitleSetPagination.max_page_size
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Returns the movie ids of the requested page of a queryset of
+        movie ids."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_keys(queryset)
+        values, reverse = self.decode_cursor(request)
+        keys = [(name, desc != reverse) for name, desc in self.keys]
+
+        queryset = queryset.order_by(*[
+            F(name).desc(nulls_last=True) if desc
+            else F(name).asc(nulls_first=True)
+            for name, desc in keys
+        ])
+        try:
+            if values is not None:
+                queryset = queryset.filter(
+                    self.get_after_condition(keys, values)
+                )
+            rows = list(
+                queryset.values_list('pk', *[name for name, _ in keys])[
+                    :self.page_size + 1
+                ]
+            )
+        except (ValueError, TypeError, DjangoValidationError):
+            # cursor values which do not fit the types of the ordering fields
+            raise NotFound(self.invalid_cursor_message)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_values = self.previous_values = None
+        if rows and (has_more or reverse):
+            self.next_values = list(rows[-1][1:])
+        if rows and (has_more if reverse else values is not None):
+            self.previous_values = list(rows[0][1:])
+        return [row[0] for row in rows]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_keys(self, queryset):
+        """Returns the (field name, descending) pairs of the ordering of the
+        queryset, followed by the id unless it is already part of it."""
+        if queryset.query.extra_order_by and not queryset.query.order_by:
+            raise ValidationError(
+                {'sort_by': 'Cursor pagination of ranked results needs a '
+                            'sort_by ordering.'}
+            )
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        keys = []
+        for value in ordering:
+            name = str(value).lstrip('-')
+            try:
+                field = queryset.model._meta.get_field(
+                    'id' if name == 'pk' else name
+                )
+            except FieldDoesNotExist:
+                field = None
+            if field is None or not field.concrete or field.is_relation:
+                raise ValidationError(
+                    {'sort_by': f'Cursor pagination cannot sort by {name}.'}
+                )
+            keys.append((field.attname, str(value).startswith('-')))
+        if not any(name == 'id' for name, _ in keys):
+            keys.append(('id', False))
+        return keys
+
+    @staticmethod
+    def get_after_condition(keys, values):
+        """Returns the condition selecting the rows sorted after the given
+        values of the ordering fields."""
+        conditions = []
+        equal = Q()
+        for (name, desc), value in zip(keys, values):
+            if value is None:
+                after = None if desc else Q(**{f'{name}__isnull': False})
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                lookup = 'lt' if desc else 'gt'
+                after = Q(**{f'{name}__{lookup}': value})
+                if desc:
+                    after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            if after is not None:
+                conditions.append(equal & after)
+            equal &= same
+        if not conditions:
+            return Q(pk__in=[])
+        return reduce(operator.or_, conditions)
+
+    def decode_cursor(self, request):
+        """Returns the ordering values and the direction of the cursor of the
+        request, or (None, False) for the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values, reverse = cursor['v'], bool(cursor['r'])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, values, reverse):
+        """Returns the url of the page after, or before if reverse is set,
+        the given values of the ordering fields."""
+        cursor = json.dumps({'v': values, 'r': int(reverse)}, default=str)
+        encoded = base64.urlsafe_b64encode(cursor.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        return self.encode_cursor(self.next_values, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_values is None:
+            return None
+        return self.encode_cursor(self.previous_values, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {
+                    'type': 'string', 'nullable': True, 'format': 'uri'
+                },
+                'results': schema,
+            },
+        }
@@ -1,8 +1,15 @@
 from django.urls import path
 
-from .views import MovieTitleListView, MovieTitleDetailView
+from .views import (
+    MovieTitleDetailView,
+    MovieTitleFacetsView,
+    MovieTitleListView,
+    MovieTitleTopView,
+)
 
 urlpatterns = [
     path('', MovieTitleListView.as_view(), name="movie-list"),
+    path('facets/', MovieTitleFacetsView.as_view(), name="movie-facets"),
+    path('top/', MovieTitleTopView.as_view(), name="movie-top"),
     path('<int:pk>', MovieTitleDetailView.as_view(), name="movie-detail"),
 ]
@@ -1,13 +1,49 @@
+from django.conf import settings
+from django.db.models import Count, F
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from django_filters import rest_framework as filters
 
-from movies.models import Movie
-from movies.serializers import MovieListSerializer, MovieDetailSerializer
-from .pagination import TitleSetPagination
+from movies.models import LeaderboardEntry, Movie, MovieCard, fold_name
+from api.v1.mixins import (
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    get_dataset,
+)
+from movies.serializers import (
+    MovieCardSerializer,
+    MovieListSerializer,
+    MovieDetailSerializer,
+)
+from .pagination import TitleCursorPagination, TitleSetPagination
 from .filters import TitleFilterSet
 
 
-class MovieTitleListView(generics.ListAPIView):
+class MovieCardMixin:
+    """Serves the precomputed list representations of the movies."""
+
+    def get_card_data(self, payload):
+        """Returns the list representation of a card, i.e. its payload with
+        the url of the movie inserted after its id."""
+        # like the url field of MovieListSerializer, which only forces the
+        # html format on requests using a format suffix
+        url = reverse(
+            'movie-detail',
+            kwargs={'pk': payload['id']},
+            request=self.request,
+            format=self.format_kwarg and 'html',
+        )
+        return {'id': payload['id'], 'url': url, **payload}
+
+
+class MovieTitleListView(
+    MovieCardMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    generics.ListAPIView,
+):
     """
     This endpoint is the main entry point of the **OCMovies API**.
 
@@ -31,14 +67,208 @@ class MovieTitleListView(generics.ListAPIView):
     """
 
     http_method_names = ['get']
-    queryset = Movie.objects.all()
+    case_sensitive_params = ['title', 'cursor']
+    queryset = Movie.objects.with_names(*MovieCardSerializer.related_fields)
     serializer_class = MovieListSerializer
     filter_backends = [filters.DjangoFilterBackend]
     filterset_class = TitleFilterSet
     pagination_class = TitleSetPagination
 
+    @property
+    def paginator(self):
+        """Uses the keyset pagination on requests with pagination=cursor,
+        in any case like the cache keys, and the page number pagination
+        otherwise."""
+        if not hasattr(self, '_paginator'):
+            request = getattr(self, 'request', None)
+            if (
+                request is not None
+                and request.query_params.get('pagination', '').lower()
+                == 'cursor'
+            ):
+                self._paginator = TitleCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def list(self, request, *args, **kwargs):
+        """Filters and paginates the movie ids, then serves the precomputed
+        cards of the page. Movies without a card, e.g. created after the last
+        run of create_db, are serialized from the normalized tables."""
+        ids = self.get_index_ids(request)
+        if ids is None:
+            queryset = self.filter_queryset(Movie.objects.all())
+            ids = queryset.values_list('id', flat=True)
+        page = self.paginate_queryset(ids)
+        ids = list(ids if page is None else page)
+        cards = MovieCard.objects.in_bulk(ids)
+        missing = self.get_queryset().in_bulk(
+            [movie_id for movie_id in ids if movie_id not in cards]
+        )
+        results = [
+            self.get_card_data(cards[movie_id].payload)
+            if movie_id in cards
+            else self.get_serializer(missing[movie_id]).data
+            for movie_id in ids
+        ]
+        if page is None:
+            return Response(results)
+        return self.get_paginated_response(results)
 
-class MovieTitleDetailView(generics.RetrieveAPIView):
+    def get_index_ids(self, request):
+        """Returns the ids of the movies selected by the filters of the
+        request from the bitmap index, when API_BITMAP_INDEX is set, or from
+        the columnar snapshot, when API_COLUMNAR_SNAPSHOT is set, or None
+        when the request is answered with SQL."""
+        if not (
+            settings.API_BITMAP_INDEX or settings.API_COLUMNAR_SNAPSHOT
+        ) or isinstance(self.paginator, TitleCursorPagination):
+            return None
+        filterset = filters.DjangoFilterBackend().get_filterset(
+            request, Movie.objects.all(), self
+        )
+        # invalid filters are reported by the SQL path
+        if not filterset.is_valid():
+            return None
+        tag = get_dataset().tag
+        ids = None
+        if settings.API_BITMAP_INDEX:
+            ids = filterset.get_bitmap_ids(tag)
+        if ids is None and settings.API_COLUMNAR_SNAPSHOT:
+            ids = filterset.get_column_ids(tag)
+        return ids
+
+
+class MovieTitleFacetsView(
+    ConditionalGetMixin, CachedResponseMixin, generics.ListAPIView
+):
+    """
+    This endpoint gives the number of movies per genre, country, language,
+    rating and decade among the movies selected by the filters of the
+    [title list endpoint](/api/v1/titles/), which it accepts as is.
+
+    Use it to display the number of results of each refinement of a search
+    along with its results, rather than requesting the titles list once per
+    genre or country.
+
+    """
+
+    http_method_names = ['get']
+    case_sensitive_params = ['title']
+    queryset = Movie.objects.all()
+    filter_backends = [filters.DjangoFilterBackend]
+    filterset_class = TitleFilterSet
+    pagination_class = None
+
+    # Relations of the movies counted by name, by name of the response field
+    relation_facets = {
+        'genres': 'genres',
+        'countries': 'countries',
+        'languages': 'languages',
+        'ratings': 'rated',
+    }
+
+    def list(self, request, *args, **kwargs):
+        """Counts the filtered movies per value of each facet, with one
+        grouped query per facet."""
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        data = {'count': queryset.count()}
+        # the filters test the many to many relations with subqueries, so
+        # joining a relation yields one row per movie and related entity
+        for name, relation in self.relation_facets.items():
+            data[name] = self.get_facet(
+                queryset.filter(**{f'{relation}__isnull': False}),
+                name=F(f'{relation}__name'),
+            )
+        data['decades'] = self.get_facet(
+            queryset.filter(year__isnull=False),
+            decade=F('year') / 10 * 10,
+        )
+        return Response(data)
+
+    @staticmethod
+    def get_facet(queryset, **value):
+        """Returns the number of rows of a queryset per value of an
+        expression, largest counts first."""
+        (key,) = value
+        return list(
+            queryset.values(**value)
+            .annotate(count=Count('pk'))
+            .order_by('-count', key)
+        )
+
+
+class MovieTitleTopView(
+    MovieCardMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    generics.ListAPIView,
+):
+    """
+    This endpoint gives the best-rated movies of the **OCMovies API** by
+    decreasing imdb score, overall, of a genre with `genre=<name>` or of a
+    decade with `decade=<year>`, e.g. `decade=1990` for the movies of the
+    years 1990 to 1999.
+
+    The leaderboards are computed when the database is created and only rank
+    the movies having a minimum number of votes. Use `limit=<n>` to choose
+    the number of movies returned (default: 10).
+
+    """
+
+    http_method_names = ['get']
+    queryset = LeaderboardEntry.objects.all()
+    pagination_class = None
+    default_limit = 10
+
+    def list(self, request, *args, **kwargs):
+        """Reads the requested movies of a leaderboard by rank."""
+        board, key = self.get_board(request)
+        limit = self.get_positive_int(request, 'limit', self.default_limit)
+        entries = self.get_queryset().filter(
+            board=board, key=key, rank__lte=limit
+        ).order_by('rank').values_list('rank', 'payload')
+        return Response({
+            'results': [
+                {'rank': rank, **self.get_card_data(payload)}
+                for rank, payload in entries
+            ]
+        })
+
+    def get_board(self, request):
+        """Returns the (board, key) pair of the leaderboard selected by the
+        genre or decade parameter of a request."""
+        genre = request.query_params.get('genre')
+        decade = request.query_params.get('decade')
+        if genre is not None and decade is not None:
+            raise ValidationError(
+                {'genre': 'Select either a genre or a decade.'}
+            )
+        if genre is not None:
+            return 'genre', fold_name(genre)
+        if decade is not None:
+            year = self.get_positive_int(request, 'decade', None)
+            return 'decade', str(year // 10 * 10)
+        return 'all', ''
+
+    @staticmethod
+    def get_positive_int(request, name, default):
+        """Returns the value of a positive integer query parameter."""
+        value = request.query_params.get(name)
+        if value is None:
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            number = 0
+        if number < 1:
+            raise ValidationError({name: 'A positive integer is required.'})
+        return number
+
+
+class MovieTitleDetailView(
+    ConditionalGetMixin, CachedResponseMixin, generics.RetrieveAPIView
+):
     """
     This endpoint gives access to detailed movie information from the
     **OCMovies API**.
@@ -62,5 +292,7 @@ class MovieTitleDetailView(generics.RetrieveAPIView):
     """
 
     http_method_names = ['get']
-    queryset = Movie.objects.all()
+    queryset = Movie.objects.with_names(
+        'actors', 'directors', 'writers', 'genres', 'countries', 'languages'
+    ).select_related('rated', 'company')
     serializer_class = MovieDetailSerializer
\ No newline at end of file
@@ -89,6 +89,46 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+#
+# The api alias holds the responses of the API views. The local memory
+# backend evicts the least recently used entries beyond MAX_ENTRIES, and
+# entries expire after TIMEOUT seconds. To share the cache between processes,
+# use "django.core.cache.backends.filebased.FileBasedCache" with a directory
+# as LOCATION. Cached responses are invalidated when create_db loads a new
+# version of the dataset.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "api": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "ocmovies-api",
+        "TIMEOUT": 3600,
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+}
+
+API_CACHE_ALIAS = "api"
+
+# Number of seconds during which the dataset version is read from the cache
+# rather than from the database
+API_DATASET_VERSION_TIMEOUT = 5
+
+# Answer the combinations of the genre, country, lang, rating and company
+# filters from an in-memory bitmap index of the movies, built by each server
+# process on the first request following a new dataset version. Set to False
+# to run every filter in SQL.
+API_BITMAP_INDEX = False
+
+# Answer the range filters on the years and imdb scores, and the sorts on the
+# numeric fields of the movies, from an in-memory NumPy snapshot of these
+# fields, built by each server process like the bitmap index. Set to False to
+# run them in SQL.
+API_COLUMNAR_SNAPSHOT = False
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
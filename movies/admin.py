@@ -16,4 +16,8 @@ admin.site.register(models.Genre)
 admin.site.register(models.Country)
 admin.site.register(models.Language)
 admin.site.register(models.Rating)
-admin.site.register(models.Company)
\ No newline at end of file
+admin.site.register(models.Company)
+admin.site.register(models.MovieCard)
+admin.site.register(models.IngestionCheckpoint)
+admin.site.register(models.Dataset)
+admin.site.register(models.LeaderboardEntry)
@@ -0,0 +1,182 @@
+"""Implementation of the movies bitmap index.
+
+This module is part of the OCMovies-API project and implements an in-memory
+index keeping the movies of each genre, country, language, rating and
+production company as a bitmap, so that combinations of these categorical
+filters are answered by intersecting bitmaps rather than by joining tables.
+
+"""
+
+import itertools
+import struct
+import threading
+from array import array
+from collections import defaultdict
+
+from movies.models import Movie
+
+# Relations of the movies indexed by name key
+INDEXED_RELATIONS = ['genres', 'countries', 'languages', 'rated', 'company']
+
+
+def positions_to_bitmap(positions, size):
+    """Returns the bitmap of size bits whose set bits are at the given
+    positions."""
+    data = bytearray((size + 7) // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, 'little')
+
+
+def iter_positions(bitmap, start=0):
+    """Yields the positions of the set bits of a bitmap in increasing order,
+    skipping the first start ones."""
+    n_words = (bitmap.bit_length() + 63) // 64
+    data = bitmap.to_bytes(n_words * 8, 'little')
+    for index, (word,) in enumerate(struct.iter_unpack('<Q', data)):
+        if not word:
+            continue
+        n_bits = word.bit_count()
+        if start >= n_bits:
+            start -= n_bits
+            continue
+        while word:
+            lowest = word & -word
+            if start:
+                start -= 1
+            else:
+                yield index * 64 + lowest.bit_length() - 1
+            word ^= lowest
+
+
+class BitmapSelection:
+    """Sequence of the ids of the movies selected by a bitmap, in increasing
+    order, which paginators count and slice without reading the ids outside
+    of the requested page."""
+
+    ordered = True
+
+    def __init__(self, bitmap, ids):
+        self.bitmap = bitmap
+        self.ids = ids
+
+    def count(self):
+        return self.bitmap.bit_count()
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return (self.ids[position] for position in iter_positions(self.bitmap))
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            ids = self[key:key + 1] if key >= 0 else list(self)[key:][:1]
+            if not ids:
+                raise IndexError('selection index out of range')
+            return ids[0]
+        start, stop, step = key.indices(self.count())
+        positions = itertools.islice(
+            iter_positions(self.bitmap, start), max(stop - start, 0)
+        )
+        return [self.ids[position] for position in positions][::step]
+
+
+class MovieBitmapIndex:
+    """In-memory index of the movies by name key of their genres, countries,
+    languages, rating and production company.
+
+    The movies are numbered in increasing id order and the movies of each
+    value are stored as a bitmap of their numbers, or as the sorted array of
+    their numbers when it is smaller, e.g. for the many companies having
+    produced a handful of movies.
+    """
+
+    def __init__(self, ids, containers, tag=None):
+        self.ids = ids
+        self.containers = containers
+        self.tag = tag
+
+    @classmethod
+    def build(cls, tag=None):
+        """Builds the index from the database, tagged with the dataset
+        version it describes."""
+        ids = array(
+            'q', Movie.objects.order_by('id').values_list('id', flat=True)
+        )
+        positions = {movie_id: number for number, movie_id in enumerate(ids)}
+        containers = {}
+        for relation in INDEXED_RELATIONS:
+            groups = defaultdict(set)
+            for movie_id, key in cls.get_relation_rows(relation):
+                if movie_id in positions:
+                    groups[key].add(positions[movie_id])
+            containers[relation] = {
+                key: cls.compress(group, len(ids))
+                for key, group in groups.items()
+            }
+        return cls(ids, containers, tag)
+
+    @staticmethod
+    def get_relation_rows(relation):
+        """Returns the (movie id, name key) pairs of a relation of the
+        movies."""
+        field = Movie._meta.get_field(relation)
+        if not field.many_to_many:
+            return (
+                Movie.objects.filter(**{f'{relation}__isnull': False})
+                .values_list('id', f'{relation}__name_key')
+                .iterator()
+            )
+        through = field.remote_field.through
+        movie = through._meta.get_field(field.m2m_field_name())
+        return through.objects.values_list(
+            movie.attname, f'{field.m2m_reverse_field_name()}__name_key'
+        ).iterator()
+
+    @staticmethod
+    def compress(positions, size):
+        """Returns the container of a set of movie numbers: an array of 32
+        bit numbers if it is smaller than a bitmap of size bits, a bitmap
+        otherwise."""
+        if len(positions) * 32 < size:
+            return array('I', sorted(positions))
+        return positions_to_bitmap(positions, size)
+
+    def to_bitmap(self, container):
+        """Returns the bitmap of a container."""
+        if isinstance(container, int):
+            return container
+        return positions_to_bitmap(container, len(self.ids))
+
+    def select(self, conditions):
+        """Returns the selection of the movies matching every relation ->
+        name key condition."""
+        bitmap = (1 << len(self.ids)) - 1
+        for relation, key in conditions.items():
+            container = self.containers[relation].get(key)
+            if container is None:
+                return BitmapSelection(0, self.ids)
+            bitmap &= self.to_bitmap(container)
+        return BitmapSelection(bitmap, self.ids)
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_index(tag):
+    """Returns the index of the dataset version identified by tag, built
+    from the database on the first request of each version."""
+    global _index
+    with _lock:
+        if _index is None or _index.tag != tag:
+            _index = MovieBitmapIndex.build(tag)
+        return _index
+
+
+def clear_index():
+    """Forgets the index, which is rebuilt on the next request."""
+    global _index
+    with _lock:
+        _index = None
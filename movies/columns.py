@@ -0,0 +1,160 @@
+"""Implementation of the movies columnar snapshot.
+
+This module is part of the OCMovies-API project and implements an in-memory
+snapshot of the numeric fields of the movies held as NumPy arrays, so that
+range filters are evaluated vectorized and the movies of a sorted page are
+selected by a partial sort rather than by sorting the filtered movies in
+SQL.
+
+"""
+
+import threading
+
+import numpy as np
+
+from movies.models import Movie
+
+# Numeric fields of the movies held by the snapshot
+SNAPSHOT_FIELDS = [
+    'year',
+    'imdb_score',
+    'avg_vote',
+    'votes',
+    'duration',
+    'metascore',
+]
+
+# Comparison of the filter lookups supported by the snapshot
+LOOKUPS = {
+    'exact': np.equal,
+    'gt': np.greater,
+    'gte': np.greater_equal,
+    'lt': np.less,
+    'lte': np.less_equal,
+}
+
+
+class ColumnarSelection:
+    """Sequence of the ids of the movies selected from the snapshot, in sort
+    order, which paginators count and slice.
+
+    A slice ending at position k only sorts the first k movies: the k-th
+    smallest value of the first sort key is found by partitioning, and only
+    the movies up to this value are sorted on every key.
+    """
+
+    ordered = True
+
+    def __init__(self, columns, rows, keys):
+        self.columns = columns
+        self.rows = rows
+        self.keys = keys
+
+    def count(self):
+        return len(self.rows)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            ids = self[key:key + 1] if key >= 0 else self[:][key:][:1]
+            if not ids:
+                raise IndexError('selection index out of range')
+            return ids[0]
+        start, stop, step = key.indices(self.count())
+        if start >= stop:
+            return []
+        rows = self.get_first_rows(stop)[start:stop:step]
+        return self.columns.ids[rows].tolist()
+
+    def get_first_rows(self, k):
+        """Returns the first k selected rows in sort order."""
+        rows = self.rows
+        if self.keys == [('id', False)]:
+            return rows[:k]
+        if self.keys == [('id', True)]:
+            return rows[::-1][:k]
+        values = [
+            self.columns.get_sort_values(name, desc)[rows]
+            for name, desc in self.keys
+        ]
+        if k < len(rows):
+            kth = np.partition(values[0], k - 1)[k - 1]
+            candidates = np.flatnonzero(values[0] <= kth)
+            rows = rows[candidates]
+            values = [value[candidates] for value in values]
+        # lexsort sorts on its last key first
+        return rows[np.lexsort(values[::-1])][:k]
+
+
+class MovieColumns:
+    """Snapshot of the numeric fields of the movies, one NumPy array per
+    field, the movies being stored in increasing id order.
+
+    Null values are stored as NaN, which fails every comparison like NULL
+    does in SQL, and sort as the smallest values like in SQLite.
+    """
+
+    def __init__(self, ids, values, tag=None):
+        self.ids = ids
+        self.values = values
+        self.tag = tag
+
+    @classmethod
+    def build(cls, tag=None):
+        """Builds the snapshot from the database, tagged with the dataset
+        version it describes."""
+        rows = list(
+            Movie.objects.order_by('id').values_list('id', *SNAPSHOT_FIELDS)
+        )
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        values = {
+            name: np.array(
+                [np.nan if row[i] is None else float(row[i]) for row in rows],
+                dtype=np.float64,
+            )
+            for i, name in enumerate(SNAPSHOT_FIELDS, start=1)
+        }
+        return cls(ids, values, tag)
+
+    def get_sort_values(self, name, desc):
+        """Returns the values of a field arranged so that sorting them in
+        increasing order sorts the movies by the field, nulls first in the
+        ascending order and last in the descending order."""
+        if name == 'id':
+            return -self.ids if desc else self.ids
+        values = np.nan_to_num(self.values[name], nan=-np.inf)
+        return -values if desc else values
+
+    def select(self, conditions, keys):
+        """Returns the selection of the movies matching every (field, lookup,
+        value) condition, sorted by the (field, descending) keys."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        for name, lookup, value in conditions:
+            mask &= LOOKUPS[lookup](self.values[name], float(value))
+        return ColumnarSelection(self, np.flatnonzero(mask), keys)
+
+
+_lock = threading.Lock()
+_columns = None
+
+
+def get_columns(tag):
+    """Returns the snapshot of the dataset version identified by tag, built
+    from the database on the first request of each version."""
+    global _columns
+    with _lock:
+        if _columns is None or _columns.tag != tag:
+            _columns = MovieColumns.build(tag)
+        return _columns
+
+
+def clear_columns():
+    """Forgets the snapshot, which is rebuilt on the next request."""
+    global _columns
+    with _lock:
+        _columns = None
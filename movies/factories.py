@@ -31,6 +31,7 @@ class ContributorFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = models.Contributor
+        django_get_or_create = ('name',)
 
     name = factory.Faker('name')
 
@@ -40,6 +41,7 @@ class GenreFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = models.Genre
+        django_get_or_create = ('name',)
 
     name = factory.Iterator(
         [
@@ -77,6 +79,7 @@ class CountryFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = models.Country
+        django_get_or_create = ('name',)
 
     name = factory.Faker('country')
 
@@ -86,6 +89,7 @@ class LanguageFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = models.Language
+        django_get_or_create = ('name',)
 
     name = factory.Faker('language_name')
 
@@ -103,7 +107,7 @@ class CompanyFactory(factory.django.DjangoModelFactory):
     """Factory responsible for building fake production company values for test purpose."""
 
     class Meta:
-        model = models.Rating
+        model = models.Company
 
     name = factory.Sequence(lambda n: f'Movie Company #{n+1}')
 
@@ -114,7 +118,7 @@ class MovieFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = models.Movie
 
-    id = factory.Faker('random_int', min=1, max=1000000)
+    id = factory.Sequence(lambda n: n + 1)
     title = factory.LazyAttribute(
         lambda obj: fake.text(max_nb_chars=20).strip('.')
     )
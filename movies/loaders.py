@@ -0,0 +1,259 @@
+"""Implementation of the loader object.
+
+This module is part of the OCMovies-API project and implements a loader
+object whose responsibility is to write chunks of normalized movies into the
+database using bulk insertions rather than one query per row.
+
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+import functools
+import hashlib
+import json
+from time import perf_counter
+
+from django.db import connection, transaction
+
+from . import models
+from .managers import NameCache, split_names
+
+
+def _unique(values):
+    """Returns the values without duplicates, keeping their first position."""
+    return list(dict.fromkeys(values))
+
+
+def _slices(values):
+    """Splits a list of query parameters into slices accepted by the
+    database in a single IN clause."""
+    size = connection.features.max_query_params or len(values) or 1
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def _timed(stage):
+    """Decorates a loader method so that its duration is added to the loader
+    timings of the given stage."""
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.timings[stage] += perf_counter() - start
+
+        return wrapper
+
+    return decorator
+
+
+def content_hash(movie_info):
+    """Returns a stable hash of a normalized movie, used to detect the movies
+    whose source data changed between two ingestions."""
+    data = json.dumps(movie_info, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class MovieBulkLoader:
+    """Object writing chunks of normalized movies into the database."""
+
+    # Fields of the normalized movie info holding comma-separated names,
+    # associated with the model used to store those names
+    named_fields = {
+        'genres': models.Genre,
+        'countries': models.Country,
+        'languages': models.Language,
+        'directors': models.Contributor,
+        'writers': models.Contributor,
+        'actors': models.Contributor,
+        'production_company': models.Company,
+        'rated': models.Rating,
+    }
+
+    # Many to many fields of the movies, with and without a position
+    positioned_relations = ['directors', 'writers', 'actors']
+    plain_relations = ['genres', 'countries', 'languages']
+
+    def __init__(self):
+        # One name cache per model, kept for the whole ingestion run
+        self.caches = {
+            model: NameCache() for model in _unique(self.named_fields.values())
+        }
+        # Cumulated duration in seconds of each stage of the ingestion
+        self.timings = defaultdict(float)
+
+    def load(self, movies_info, checkpoint=None):
+        """Writes a chunk of normalized movies into the database within a
+        single transaction and returns the ids of the movies written.
+
+        The optional ingestion checkpoint is saved in the same transaction.
+        """
+        movies_info, names = self._prepare(movies_info)
+        with self._transaction(checkpoint):
+            ids = self.resolve_names(names)
+            self.create_movies(movies_info, names, ids)
+            self.create_relations(movies_info, names, ids)
+        return [info['id'] for info in movies_info]
+
+    def upsert(self, movies_info, checkpoint=None):
+        """Inserts the new movies of a chunk and updates the ones whose
+        content hash changed, within a single transaction.
+
+        Returns the ids of the inserted movies, the ids of the updated ones
+        and the number of unchanged movies. The optional ingestion checkpoint
+        is saved in the same transaction.
+        """
+        movies_info, names = self._prepare(movies_info)
+        with self._transaction(checkpoint):
+            hashes = {}
+            for ids in _slices([info['id'] for info in movies_info]):
+                hashes.update(
+                    models.Movie.objects.filter(id__in=ids).values_list(
+                        'id', 'content_hash'
+                    )
+                )
+            new_info, new_names, changed_info, changed_names = [], [], [], []
+            for info, movie_names in zip(movies_info, names):
+                if info['id'] not in hashes:
+                    new_info.append(info)
+                    new_names.append(movie_names)
+                elif hashes[info['id']] != info['content_hash']:
+                    changed_info.append(info)
+                    changed_names.append(movie_names)
+            if new_info or changed_info:
+                ids = self.resolve_names(new_names + changed_names)
+                self.create_movies(new_info, new_names, ids)
+                self.update_movies(changed_info, changed_names, ids)
+                self.delete_relations([info['id'] for info in changed_info])
+                self.create_relations(
+                    new_info + changed_info, new_names + changed_names, ids
+                )
+        n_unchanged = len(movies_info) - len(new_info) - len(changed_info)
+        return (
+            [info['id'] for info in new_info],
+            [info['id'] for info in changed_info],
+            n_unchanged,
+        )
+
+    @_timed('row preparation')
+    def _prepare(self, movies_info):
+        """Copies the movies of a chunk, computes their content hash and
+        splits their comma-separated names."""
+        movies_info = [
+            dict(info, content_hash=content_hash(info)) for info in movies_info
+        ]
+        names = [
+            {field: split_names(info.pop(field)) for field in self.named_fields}
+            for info in movies_info
+        ]
+        return movies_info, names
+
+    @contextmanager
+    def _transaction(self, checkpoint=None):
+        """Runs a block in a transaction saving the optional checkpoint, and
+        forgets the cached names if it is rolled back since their ids may no
+        longer exist."""
+        try:
+            with transaction.atomic():
+                yield
+                if checkpoint is not None:
+                    checkpoint.save()
+        except Exception:
+            for cache in self.caches.values():
+                cache.clear()
+            raise
+
+    @_timed('name resolution')
+    def resolve_names(self, names):
+        """Gets or creates in bulk the named entities of a chunk and returns
+        a mapping from model to a name -> id dictionary."""
+        wanted = {}
+        for movie_names in names:
+            for field, model in self.named_fields.items():
+                wanted.setdefault(model, set()).update(movie_names[field])
+        return {
+            model: model.objects.get_or_create_ids(
+                model_names, cache=self.caches[model]
+            )
+            for model, model_names in wanted.items()
+        }
+
+    @_timed('movie insert')
+    def create_movies(self, movies_info, names, ids):
+        """Inserts the movies of a chunk with a single bulk insertion."""
+        models.Movie.objects.bulk_create(
+            self._build_movies(movies_info, names, ids)
+        )
+
+    @_timed('movie insert')
+    def update_movies(self, movies_info, names, ids):
+        """Updates every field of existing movies with bulk updates."""
+        fields = [
+            field.name
+            for field in models.Movie._meta.concrete_fields
+            if not field.primary_key
+        ]
+        models.Movie.objects.bulk_update(
+            self._build_movies(movies_info, names, ids), fields
+        )
+
+    @staticmethod
+    def _build_movies(movies_info, names, ids):
+        """Builds the movie instances of a chunk with their foreign keys."""
+        companies = ids[models.Company]
+        ratings = ids[models.Rating]
+        return [
+            models.Movie(
+                **info,
+                company_id=companies[movie_names['production_company'][0]],
+                rated_id=ratings[movie_names['rated'][0]],
+            )
+            for info, movie_names in zip(movies_info, names)
+        ]
+
+    @_timed('relation insert')
+    def delete_relations(self, movie_ids):
+        """Deletes the positioned and plain relations of the given movies."""
+        for field in self.positioned_relations + self.plain_relations:
+            through = getattr(models.Movie, field).through
+            for ids in _slices(movie_ids):
+                through.objects.filter(movie_id__in=ids).delete()
+
+    def delete_missing(self, movie_ids):
+        """Deletes the movies whose id is not in the given set of ids and
+        returns the number of deleted movies."""
+        movie_ids = set(movie_ids)
+        missing = [
+            movie_id
+            for movie_id in models.Movie.objects.values_list('id', flat=True)
+            if movie_id not in movie_ids
+        ]
+        with self._transaction():
+            for ids in _slices(missing):
+                models.Movie.objects.filter(id__in=ids).delete()
+        return len(missing)
+
+    @_timed('relation insert')
+    def create_relations(self, movies_info, names, ids):
+        """Inserts the positioned and plain relations of a chunk with one bulk
+        insertion per through table.
+
+        The movies have just been created or stripped of their relations, so
+        their existing links are not looked up.
+        """
+        for field in self.positioned_relations + self.plain_relations:
+            related = ids[self.named_fields[field]]
+            items = [
+                (info['id'], [related[name] for name in movie_names[field]])
+                for info, movie_names in zip(movies_info, names)
+            ]
+            if field in self.positioned_relations:
+                models.Movie.objects.add_positioned(
+                    field, items, check_existing=False
+                )
+            else:
+                models.Movie.objects.add_related(
+                    field, items, check_existing=False
+                )
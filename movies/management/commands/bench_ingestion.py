@@ -0,0 +1,170 @@
+"""Implementation of the bench_ingestion command.
+
+This module is part of the OCMovies-API project and implements the
+bench_ingestion command measuring each stage of the csv ingestion pipeline
+on synthetic archives of various sizes, in a throwaway database.
+
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from django.db import connection
+from django_tqdm import BaseCommand
+
+from movies.loaders import MovieBulkLoader
+from movies.models import MovieCard
+from movies.normalizers import MovieNormalizer
+from movies.sqlite import bulk_load_profile
+from movies.synthetic import generate_movies_csv
+
+from .create_db import read_csv_chunks
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None
+
+STAGES = [
+    'csv decode',
+    'normalization',
+    'row preparation',
+    'name resolution',
+    'movie insert',
+    'relation insert',
+    'commit',
+    'index rebuild',
+    'card build',
+]
+
+
+@contextmanager
+def throwaway_database(dbpath):
+    """Runs a block in a new database at dbpath, leaving the project database
+    untouched."""
+    connection.settings_dict['TEST']['NAME'] = str(dbpath)
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def peak_memory():
+    """Returns the peak resident memory of the process in MiB, if known."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    """Implements the bench_ingestion cli command."""
+
+    help = 'Benchmarks the csv ingestion pipeline on synthetic archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[10000],
+            help='sizes of the generated archives (default: 10000)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            dest='batch_size',
+            help='number of csv rows inserted per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='seed of the synthetic data generator (default: 0)',
+        )
+        parser.add_argument(
+            '--keep-csv',
+            default=None,
+            dest='keep_csv',
+            help='directory where the generated archives are kept',
+        )
+
+    def handle(self, *args, **options):
+        """Global entry point of the command, handles the cli options."""
+        with TemporaryDirectory() as tmpdir:
+            workdir = Path(options['keep_csv'] or tmpdir)
+            workdir.mkdir(parents=True, exist_ok=True)
+            for n_rows in sorted(options['rows']):
+                path = workdir / f'movies-{n_rows}.csv.zip'
+                self.stdout.write(
+                    self.style.MIGRATE_HEADING(f'Benchmark on {n_rows} rows')
+                )
+                start = perf_counter()
+                generate_movies_csv(path, n_rows, seed=options['seed'])
+                self.stdout.write(
+                    f'{path.name} generated in {perf_counter() - start:.1f}s'
+                )
+                timings = self.run_in_test_db(
+                    Path(tmpdir) / 'bench.sqlite3', path, options['batch_size']
+                )
+                self.write_timings(n_rows, timings)
+
+    def run_in_test_db(self, dbpath, path, batch_size):
+        """Runs the ingestion pipeline in a new database at dbpath, leaving
+        the project database untouched."""
+        with throwaway_database(dbpath):
+            return self.run_pipeline(path, batch_size)
+
+    def run_pipeline(self, path, batch_size):
+        """Ingests the archive and returns the duration of each stage."""
+        normalizer = MovieNormalizer()
+        loader = MovieBulkLoader()
+        timings = {stage: 0.0 for stage in STAGES}
+        total = perf_counter()
+        with bulk_load_profile():
+            chunks = read_csv_chunks(path, batch_size)
+            while True:
+                start = perf_counter()
+                chunk = next(chunks, None)
+                timings['csv decode'] += perf_counter() - start
+                if chunk is None:
+                    break
+                start = perf_counter()
+                normalizer.normalize_batch(chunk)
+                timings['normalization'] += perf_counter() - start
+                start = perf_counter()
+                loader.load(chunk)
+                timings['commit'] += perf_counter() - start
+            rebuild = perf_counter()
+        timings['index rebuild'] = perf_counter() - rebuild
+        start = perf_counter()
+        MovieCard.objects.rebuild()
+        timings['card build'] = perf_counter() - start
+        timings.update(loader.timings)
+        # what remains of the load calls is the transaction handling
+        timings['commit'] -= sum(loader.timings.values())
+        timings['total'] = perf_counter() - total
+        return timings
+
+    def write_timings(self, n_rows, timings):
+        """Displays the stage timings of a benchmark run."""
+        total = timings['total']
+        for stage in STAGES:
+            self.stdout.write(
+                f'  {stage:<16} {timings[stage]:8.2f}s '
+                f'{timings[stage] / total:6.1%}'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'  {"total":<16} {total:8.2f}s '
+                f'({n_rows / total:.0f} rows/s)'
+            )
+        )
+        memory = peak_memory()
+        if memory is not None:
+            self.stdout.write(f'  peak memory      {memory:8.1f} MiB')
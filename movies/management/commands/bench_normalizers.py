@@ -0,0 +1,81 @@
+"""Implementation of the bench_normalizers command.
+
+This module is part of the OCMovies-API project and implements the
+bench_normalizers command comparing the row by row and the column oriented
+normalization of the movies csv data.
+
+"""
+
+import copy
+from time import perf_counter
+
+from django.core.management import CommandError
+from django_tqdm import BaseCommand
+
+from movies.normalizers import MovieNormalizer
+
+from .create_db import read_csv_chunks
+
+
+class Command(BaseCommand):
+    """Implements the bench_normalizers cli command."""
+
+    help = 'Compares normalize_all and normalize_batch on the movies csv data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='data/movies.csv.zip',
+            help='zipped movies csv file (default: data/movies.csv.zip)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            dest='batch_size',
+            help='number of movies normalized per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='number of timed runs, the best one is kept (default: 3)',
+        )
+
+    def handle(self, *args, **options):
+        """Global entry point of the command, handles the cli options."""
+        normalizer = MovieNormalizer()
+        chunks = list(read_csv_chunks(options['path'], options['batch_size']))
+        n_movies = sum(len(chunk) for chunk in chunks)
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f'Normalizing {n_movies} movies from {options["path"]}...'
+            )
+        )
+
+        timings = {}
+        results = {}
+        for name, method in [
+            ('normalize_all', normalizer.normalize_all),
+            ('normalize_batch', normalizer.normalize_batch),
+        ]:
+            best = None
+            for _ in range(options['repeat']):
+                data = copy.deepcopy(chunks)
+                start = perf_counter()
+                for chunk in data:
+                    method(chunk)
+                elapsed = perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+            results[name] = data
+            self.stdout.write(
+                f'{name}: {best:.3f}s ({n_movies / best:.0f} rows/s)'
+            )
+
+        if results['normalize_all'] != results['normalize_batch']:
+            raise CommandError('normalize_batch and normalize_all differ')
+        speedup = timings['normalize_all'] / timings['normalize_batch']
+        self.stdout.write(
+            self.style.SUCCESS(f'Identical results, {speedup:.2f}x speed-up')
+        )
@@ -0,0 +1,236 @@
+"""Implementation of the bench_queries command.
+
+This module is part of the OCMovies-API project and implements the
+bench_queries command measuring the queries run by the titles list endpoint
+for various filters, on the project database or on a throwaway database
+loaded with synthetic movies, optionally answering the categorical filters
+from the bitmap index and the numeric filters and sorts from the columnar
+snapshot.
+
+"""
+
+import statistics
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from django.core.management import CommandError
+from django_tqdm import BaseCommand
+
+from api.v1.titles.filters import TitleFilterSet
+from api.v1.titles.pagination import TitleSetPagination
+from movies import bitmaps, columns
+from movies.loaders import MovieBulkLoader
+from movies.models import Movie
+from movies.normalizers import MovieNormalizer
+from movies.sqlite import bulk_load_profile
+from movies.synthetic import generate_movies_csv
+
+from .bench_ingestion import throwaway_database
+from .create_db import read_csv_chunks
+
+# Query parameters of the titles list endpoint benchmarked by each scenario,
+# built from the searched term and name of the command options
+SCENARIOS = {
+    'title_contains': lambda options: {'title_contains': options['term']},
+    'q': lambda options: {'q': options['term']},
+    'q_prefix': lambda options: {'q': options['term'][:3]},
+    'q_sorted': lambda options: {
+        'q': options['term'],
+        'sort_by': '-imdb_score',
+    },
+    'director_contains': lambda options: {
+        'director_contains': options['name']
+    },
+    'actor_contains': lambda options: {'actor_contains': options['name']},
+    'actor_contains_short': lambda options: {
+        'actor_contains': options['name'][:2]
+    },
+    'multi_filter': lambda options: {
+        'genre': 'drama',
+        'country': 'country 0',
+        'lang': 'language 0',
+    },
+    'multi_filter_sorted': lambda options: {
+        'genre': 'drama',
+        'country': 'country 0',
+        'lang': 'language 0',
+        'sort_by': '-imdb_score',
+    },
+    'multi_contains': lambda options: {
+        'genre_contains': 'r',
+        'country_contains': 'country 1',
+        'actor_contains': options['name'],
+    },
+    'range_filter': lambda options: {
+        'min_year': 1990,
+        'max_year': 2010,
+        'imdb_score_min': 7,
+    },
+    'range_sorted': lambda options: {
+        'min_year': 1990,
+        'max_year': 2010,
+        'imdb_score_min': 7,
+        'sort_by': '-votes',
+    },
+    'sorted': lambda options: {'sort_by': '-votes'},
+    'sorted_nullable': lambda options: {'sort_by': '-metascore'},
+}
+
+
+class Command(BaseCommand):
+    """Implements the bench_queries cli command."""
+
+    help = 'Benchmarks the queries of the titles list endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            nargs='+',
+            choices=list(SCENARIOS),
+            default=list(SCENARIOS),
+            help='scenarios to run (default: all)',
+        )
+        parser.add_argument(
+            '--term',
+            default='love',
+            help='word searched in the titles (default: love)',
+        )
+        parser.add_argument(
+            '--name',
+            default='kuros',
+            help='substring searched in the contributor names '
+            '(default: kuros)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='number of timed runs of each scenario (default: 5)',
+        )
+        parser.add_argument(
+            '--synthetic',
+            type=int,
+            default=None,
+            metavar='ROWS',
+            help='runs on a throwaway database of ROWS synthetic movies '
+            'rather than on the project database',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='seed of the synthetic data generator (default: 0)',
+        )
+        parser.add_argument(
+            '--bitmap-index',
+            action='store_true',
+            help='answers the categorical filters from the bitmap index',
+        )
+        parser.add_argument(
+            '--columns',
+            action='store_true',
+            help='answers the numeric filters and sorts from the columnar '
+            'snapshot',
+        )
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='displays the query plan of each scenario',
+        )
+
+    def handle(self, *args, **options):
+        """Global entry point of the command, handles the cli options."""
+        if options['synthetic'] is None:
+            self.run_scenarios(options)
+            return
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'movies.csv.zip'
+            generate_movies_csv(path, options['synthetic'], options['seed'])
+            with throwaway_database(Path(tmpdir) / 'bench.sqlite3'):
+                self.stdout.write(
+                    self.style.MIGRATE_HEADING(
+                        f'Loading {options["synthetic"]} synthetic movies...'
+                    )
+                )
+                self.load_archive(path)
+                self.run_scenarios(options)
+
+    def load_archive(self, path):
+        """Loads a zipped movies csv file into the current database."""
+        normalizer = MovieNormalizer()
+        loader = MovieBulkLoader()
+        with bulk_load_profile():
+            for chunk in read_csv_chunks(path, 1000):
+                normalizer.normalize_batch(chunk)
+                loader.load(chunk)
+
+    def run_scenarios(self, options):
+        """Runs and times the selected scenarios."""
+        n_movies = Movie.objects.count()
+        if not n_movies:
+            raise CommandError(
+                'The database holds no movies, run create_db or use '
+                '--synthetic'
+            )
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(f'Querying {n_movies} movies')
+        )
+        tag = None
+        if options['bitmap_index'] or options['columns']:
+            tag = 'bench'
+        if options['bitmap_index']:
+            start = perf_counter()
+            bitmaps.get_index(tag)
+            self.stdout.write(
+                f'  bitmap index built in {perf_counter() - start:.2f}s'
+            )
+        if options['columns']:
+            start = perf_counter()
+            columns.get_columns(tag)
+            self.stdout.write(
+                f'  columnar snapshot built in {perf_counter() - start:.2f}s'
+            )
+        for name in options['scenario']:
+            params = SCENARIOS[name](options)
+            timings = []
+            for _ in range(options['repeat']):
+                start = perf_counter()
+                count, ids = self.run_query(params, tag, options)
+                timings.append(perf_counter() - start)
+            self.stdout.write(
+                f'  {name:<24} {count:7d} movies  '
+                f'median {statistics.median(timings) * 1000:8.2f}ms  '
+                f'best {min(timings) * 1000:8.2f}ms'
+            )
+            if options['explain']:
+                self.stdout.write(self.get_queryset(params)[:1].explain())
+
+    @staticmethod
+    def get_filterset(params):
+        """Returns the validated filters of the titles list endpoint."""
+        filterset = TitleFilterSet(params, queryset=Movie.objects.all())
+        if not filterset.is_valid():
+            raise CommandError(f'Invalid filters {params}: {filterset.errors}')
+        return filterset
+
+    def get_queryset(self, params):
+        """Returns the movie ids filtered like the titles list endpoint."""
+        return self.get_filterset(params).qs.values_list('id', flat=True)
+
+    def run_query(self, params, tag=None, options=None):
+        """Runs the count and first page queries of the titles list endpoint
+        and returns their results, read from the bitmap index or the columnar
+        snapshot of the dataset tag if selected by the options and if they
+        answer the filters."""
+        ids = None
+        options = options or {}
+        if options.get('bitmap_index'):
+            ids = self.get_filterset(params).get_bitmap_ids(tag)
+        if ids is None and options.get('columns'):
+            ids = self.get_filterset(params).get_column_ids(tag)
+        if ids is None:
+            ids = self.get_queryset(params)
+        count = ids.count()
+        page = list(ids[:TitleSetPagination.page_size])
+        return count, page
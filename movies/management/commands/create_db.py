@@ -5,18 +5,82 @@ command to restore the database from a sqlite3 backup file or from csv data.
 
 """
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import csv
+import hashlib
 from io import TextIOWrapper
+from itertools import islice
+import os
 from pathlib import Path
 from shutil import copyfile
+from time import perf_counter
 from zipfile import ZipFile
 
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
 from django_tqdm import BaseCommand
 from django.conf import settings
 
-from movies.models import Movie
+from movies.loaders import MovieBulkLoader
+from movies.models import (
+    Dataset,
+    IngestionCheckpoint,
+    LeaderboardEntry,
+    Movie,
+    MovieCard,
+)
 from movies.normalizers import MovieNormalizer
+from movies.sqlite import bulk_load_profile
+
+
+def chunked(iterable, size):
+    """Yields successive lists of at most size items from the iterable."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+CSV_PATH = 'data/movies.csv.zip'
+
+
+def file_hash(path):
+    """Returns the sha256 hash of a file, read by blocks of 1 MiB."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as infile:
+        while block := infile.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_csv_chunks(path, batch_size, skip=0):
+    """Streams the rows of a zipped movies csv file as lists of at most
+    batch_size rows, after skipping the first skip rows."""
+    with ZipFile(path) as zf:
+        with zf.open('movies.csv', 'r') as infile:
+            reader = csv.DictReader(TextIOWrapper(infile, 'utf-8'))
+            yield from chunked(islice(reader, skip, None), batch_size)
+
+
+def normalize_chunks(chunks, workers=1):
+    """Yields the normalized chunks in their original order.
+
+    With several workers, chunks are normalized by a pool of processes while
+    the caller consumes the previous ones. At most two chunks per worker are
+    in flight so memory stays bounded.
+    """
+    normalizer = MovieNormalizer()
+    if workers == 1:
+        for chunk in chunks:
+            yield normalizer.normalize_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(normalizer.normalize_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 class Command(BaseCommand):
@@ -32,46 +96,326 @@ class Command(BaseCommand):
             dest='fromcsv',
             help='create db from raw data csv',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            dest='batch_size',
+            help='number of csv rows inserted per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            dest='workers',
+            help=(
+                'number of processes normalizing the csv rows, 0 to use all '
+                'the available cores (default: 1)'
+            ),
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            default=False,
+            help=(
+                'with --from-csv, keep the existing db and only insert new '
+                'movies and update the changed ones'
+            ),
+        )
+        parser.add_argument(
+            '--delete-missing',
+            action='store_true',
+            default=False,
+            dest='delete_missing',
+            help='with --incremental, delete movies absent from the csv',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            default=False,
+            help=(
+                'with --from-csv, resume an interrupted ingestion of the same '
+                'archive from its first uncommitted row'
+            ),
+        )
+        parser.add_argument(
+            '--top-size',
+            type=int,
+            default=100,
+            dest='top_size',
+            help='number of movies of each leaderboard (default: 100)',
+        )
+        parser.add_argument(
+            '--top-min-votes',
+            type=int,
+            default=1000,
+            dest='top_min_votes',
+            help=(
+                'minimum number of votes of the movies of the leaderboards '
+                '(default: 1000)'
+            ),
+        )
 
     def handle(self, *args, **options):
         """Global entry point of the command, handles the cli options."""
-        # if  database exists, a backup is done and actual db is removed
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer')
+        if options['workers'] < 0:
+            raise CommandError('--workers must be a positive integer or 0')
+        if options['incremental'] and not options['fromcsv']:
+            raise CommandError('--incremental requires --from-csv')
+        if options['delete_missing'] and not options['incremental']:
+            raise CommandError('--delete-missing requires --incremental')
+        if options['resume'] and not options['fromcsv']:
+            raise CommandError('--resume requires --from-csv')
+        if options['resume'] and options['delete_missing']:
+            raise CommandError('--resume cannot be used with --delete-missing')
+        if options['top_size'] < 1:
+            raise CommandError('--top-size must be a positive integer')
+        self.top_options = {
+            'size': options['top_size'],
+            'min_votes': options['top_min_votes'],
+        }
+
+        # if  database exists, a backup is done and actual db is removed,
+        # a resumed ingestion keeps both the backup and the partial db
         dbname = settings.DATABASES['default']['NAME']
         dbname_bkp = Path(f'{dbname}.bkp')
         try:
-            copyfile(
-                dbname,
-                dbname_bkp,
-            )
-            dbname.unlink()
+            if not options['resume']:
+                copyfile(
+                    dbname,
+                    dbname_bkp,
+                )
+            if not (options['incremental'] or options['resume']):
+                dbname.unlink()
         except FileNotFoundError:
             pass
 
         if options['fromcsv']:
-            self.create_db_from_csv()
+            self.create_db_from_csv(
+                options['batch_size'],
+                options['workers'] or os.cpu_count(),
+                incremental=options['incremental'],
+                delete_missing=options['delete_missing'],
+                resume=options['resume'],
+            )
         else:
             self.create_db_default(dbname)
 
-    def create_db_from_csv(self):
+    def create_db_from_csv(
+        self,
+        batch_size,
+        workers,
+        incremental=False,
+        delete_missing=False,
+        resume=False,
+    ):
         """Main entry point of the --from-csv option."""
-        normalizer = MovieNormalizer()
+        loader = MovieBulkLoader()
 
         self.stdout.write(
             self.style.MIGRATE_HEADING('Executing the migrations...')
         )
         call_command('migrate')
 
+        checkpoint = self.get_checkpoint(
+            file_hash(CSV_PATH), resume, incremental
+        )
+        if checkpoint.completed:
+            self.stdout.write(
+                self.style.SUCCESS('The ingestion of this archive is complete')
+            )
+            return
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                'Updating the movies...' if incremental
+                else 'Inserting the movies...'
+            )
+        )
+        if checkpoint.last_row:
+            self.stdout.write(
+                f'Resuming after row {checkpoint.last_row} of {CSV_PATH}'
+            )
+        n_movies = n_inserted = n_updated = n_unchanged = 0
+        seen_ids = set()
+        changed_ids = []
+        start = perf_counter()
+        # indexes are kept in incremental mode to look up existing movies
+        with bulk_load_profile(
+            drop_indexes=not incremental,
+            dropped=checkpoint.dropped_indexes,
+        ) as profile:
+            self.write_profile('Bulk load profile', profile.get('pragmas'))
+            if profile.get('indexes') or profile.get('triggers'):
+                self.stdout.write(
+                    f'{len(profile["indexes"])} secondary indexes and '
+                    f'{len(profile["triggers"])} triggers dropped until the '
+                    'end of the load'
+                )
+            checkpoint.dropped_indexes = profile.get(
+                'indexes', []
+            ) + profile.get('triggers', [])
+            checkpoint.save()
+            t = self.tqdm(total=85855, initial=checkpoint.last_row)
+            chunks = read_csv_chunks(
+                CSV_PATH, batch_size, skip=checkpoint.last_row
+            )
+            for chunk in normalize_chunks(chunks, workers):
+                checkpoint.last_row += len(chunk)
+                if incremental:
+                    inserted, updated, unchanged = loader.upsert(
+                        chunk, checkpoint
+                    )
+                    n_inserted += len(inserted)
+                    n_updated += len(updated)
+                    n_unchanged += unchanged
+                    changed_ids.extend(inserted + updated)
+                    seen_ids.update(movie['id'] for movie in chunk)
+                else:
+                    n_inserted += len(loader.load(chunk, checkpoint))
+                n_movies += len(chunk)
+                t.update(len(chunk))
+            if delete_missing:
+                n_deleted = loader.delete_missing(seen_ids)
+            else:
+                n_deleted = 0
+            t.close()
+        checkpoint.dropped_indexes = []
+        checkpoint.save()
+        elapsed = perf_counter() - start
+        if profile:
+            self.stdout.write(
+                'Indexes rebuilt and planner statistics refreshed (ANALYZE)'
+            )
+            if profile.get('fts_tables'):
+                self.stdout.write(
+                    'Full-text indexes rebuilt: '
+                    f'{", ".join(profile["fts_tables"])}'
+                )
+            self.write_profile('Serving profile', profile['serving_pragmas'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{n_movies} movies processed in {elapsed:.1f}s '
+                f'({n_movies / elapsed:.0f} rows/s, {workers} workers)'
+            )
+        )
+        if incremental:
+            self.stdout.write(
+                f'{n_inserted} inserted, {n_updated} updated, '
+                f'{n_unchanged} unchanged, {n_deleted} deleted'
+            )
+        for model, cache in loader.caches.items():
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {len(cache)} names, '
+                f'{cache.hits} cache hits, {cache.misses} cache misses '
+                f'({cache.hit_rate:.1%} hit rate)'
+            )
+        # the movies changed before the interruption of a resumed ingestion
+        # are unknown, so their cards are rebuilt with all the others
+        if incremental and not resume:
+            self.build_cards(changed_ids)
+        else:
+            self.build_cards()
+        changed_leaderboards = self.build_leaderboards()
+        # an incremental ingestion which changed nothing keeps the cached
+        # responses, unless changes were made before its interruption or the
+        # leaderboards were built with other options
+        if (
+            not incremental
+            or resume
+            or n_inserted
+            or n_updated
+            or n_deleted
+            or changed_leaderboards
+        ):
+            self.bump_dataset()
+        else:
+            self.stdout.write('No change, the dataset version is kept')
+        # completed last, so that a failure of the steps above is recovered
+        # by resuming the ingestion
+        checkpoint.completed = True
+        checkpoint.save()
+
+    def build_cards(self, movie_ids=None):
+        """Rebuilds the precomputed list representation of every movie, or
+        of the given movies only."""
         self.stdout.write(
-            self.style.MIGRATE_HEADING('Inserting the movies...')
+            self.style.MIGRATE_HEADING('Building the movie cards...')
+        )
+        start = perf_counter()
+        n_cards = MovieCard.objects.rebuild(movie_ids=movie_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{n_cards} cards built in {perf_counter() - start:.1f}s'
+            )
         )
-        with ZipFile('data/movies.csv.zip') as zf:
-            with zf.open('movies.csv', 'r') as infile:
-                reader = csv.DictReader(TextIOWrapper(infile, 'utf-8'))
-                t = self.tqdm(total=85855)
-                for i, movie_info in enumerate(reader, start=1):
-                    t.update(1)
-                    normalizer.normalize(movie_info)
-                    Movie.objects.create_movie(movie_info)
+
+    def build_leaderboards(self):
+        """Rebuilds the leaderboards of the best-rated movies overall, per
+        genre and per decade, and returns whether their rankings changed."""
+        self.stdout.write(
+            self.style.MIGRATE_HEADING('Building the leaderboards...')
+        )
+        start = perf_counter()
+        fields = ('board', 'key', 'rank', 'movie_id')
+        previous = set(LeaderboardEntry.objects.values_list(*fields))
+        n_entries = LeaderboardEntry.objects.rebuild(**self.top_options)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{n_entries} leaderboard entries built in '
+                f'{perf_counter() - start:.1f}s'
+            )
+        )
+        return previous != set(LeaderboardEntry.objects.values_list(*fields))
+
+    def bump_dataset(self):
+        """Records a new version of the dataset, which invalidates the cached
+        responses of the API."""
+        dataset = Dataset.objects.bump()
+        self.stdout.write(
+            self.style.SUCCESS(f'Dataset version {dataset.version} published')
+        )
+
+    def get_checkpoint(self, source_hash, resume, incremental=False):
+        """Returns the checkpoint of the ingestion of the source archive, reset
+        unless the ingestion is resumed, in which case it must be resumed in
+        the mode, incremental or not, it was started with."""
+        if not resume:
+            checkpoint, _ = IngestionCheckpoint.objects.update_or_create(
+                source_hash=source_hash,
+                defaults={
+                    'last_row': 0,
+                    'completed': False,
+                    'incremental': incremental,
+                },
+            )
+            return checkpoint
+        try:
+            checkpoint = IngestionCheckpoint.objects.get(
+                source_hash=source_hash
+            )
+        except IngestionCheckpoint.DoesNotExist:
+            raise CommandError(
+                f'No ingestion of {CSV_PATH} to resume, run the command '
+                'without --resume'
+            )
+        if checkpoint.incremental != incremental:
+            raise CommandError(
+                f'The ingestion of {CSV_PATH} was started '
+                f'{"with" if checkpoint.incremental else "without"} '
+                '--incremental, resume it in the same mode'
+            )
+        return checkpoint
+
+    def write_profile(self, title, pragmas):
+        """Displays the SQLite pragmas applied by the command."""
+        if pragmas:
+            settings_ = ', '.join(
+                f'{name}={value}' for name, value in pragmas.items()
+            )
+            self.stdout.write(f'{title}: {settings_}')
 
     def create_db_default(self, dbname):
         """Main entry point of the default option using a db.sqlite3 backup."""
@@ -84,4 +428,15 @@ class Command(BaseCommand):
         with ZipFile('data/movies.db.zip', 'r') as zipobj:
             zipobj.extractall(path=str(settings.BASE_DIR))
             Path(settings.BASE_DIR / 'db.sqlite3').replace(dbname)
-        self.stdout.write(self.style.SUCCESS('OK'))
\ No newline at end of file
+        # the backup may predate the latest migrations of the movies app
+        call_command('migrate', verbosity=0)
+        self.stdout.write(self.style.SUCCESS('OK'))
+        # the backup may hold the cards already, only the missing ones are
+        # built
+        self.build_cards(
+            Movie.objects.filter(card__isnull=True).values_list(
+                'id', flat=True
+            )
+        )
+        self.build_leaderboards()
+        self.bump_dataset()
\ No newline at end of file
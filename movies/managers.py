@@ -5,11 +5,41 @@ responsible to handle movies and their related data in the database.
 
 """
 
+from collections import defaultdict
+
 from django import db
 
 from movies import models
 
 
+def split_names(names):
+    """Splits comma-separated names into a list of stripped names."""
+    return [name.strip() for name in names.split(',') if name.strip()]
+
+
+class NameCache:
+    """In-process name -> id cache counting its hits and misses, meant to live
+    for the duration of an ingestion run."""
+
+    def __init__(self):
+        self.ids = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def clear(self):
+        """Forgets all the cached ids, e.g. after a rolled back transaction."""
+        self.ids.clear()
+
+    @property
+    def hit_rate(self):
+        """Ratio of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
 class UniqueNameManager(db.models.Manager):
     """Generic manager responsible of handling entities described with a unique
     name."""
@@ -17,20 +47,173 @@ class UniqueNameManager(db.models.Manager):
     def get_or_create_from_names(self, names):
         """Gets or creates objects from comma-separated names."""
         objects = []
-        names = [name.strip() for name in names.split(',') if name.strip()]
+        names = split_names(names)
         for name in names:
             obj, _ = self.get_or_create(name=name)
             objects.append(obj)
         return objects
 
+    def get_or_create_ids(self, names, cache=None):
+        """Gets or creates objects from a collection of names and returns a
+        name -> id dictionary.
+
+        Names absent from the optional cache are resolved with a single IN
+        query and the missing ones are created with a single bulk insertion.
+        """
+        names = set(names)
+        ids = {}
+        if cache is not None:
+            for name in names:
+                if name in cache.ids:
+                    ids[name] = cache.ids[name]
+            cache.hits += len(ids)
+            cache.misses += len(names) - len(ids)
+        unknown = [name for name in names if name not in ids]
+        if unknown:
+            ids.update(self._get_ids(unknown))
+            missing = [name for name in unknown if name not in ids]
+            if missing:
+                self.bulk_create([self.model(name=name) for name in missing])
+                ids.update(self._get_ids(missing))
+            if cache is not None:
+                cache.ids.update((name, ids[name]) for name in unknown)
+        return ids
+
+    def _get_ids(self, names):
+        """Returns a name -> id dictionary for the existing names, splitting
+        the IN query when it exceeds the database parameters limit."""
+        size = (
+            db.connections[self.db].features.max_query_params or len(names)
+        )
+        ids = {}
+        for start in range(0, len(names), size):
+            ids.update(
+                self.filter(name__in=names[start:start + size]).values_list(
+                    'name', 'id'
+                )
+            )
+        return ids
+
     def get_by_natural_key(self, name):
         """Allows to use name as a natural key during fixture serialization."""
         return self.get(name=name)
 
 
+def _pk(obj):
+    """Returns the primary key of a model instance, or the value itself if it
+    already is a primary key."""
+    return getattr(obj, 'pk', obj)
+
+
 class MovieManager(db.models.Manager):
     """Manager responsible of handling the collection of movies."""
 
+    def _get_through(self, field_name):
+        """Returns the through model of a many to many field of the movies,
+        with the attribute names of its movie and related foreign keys."""
+        field = self.model._meta.get_field(field_name)
+        through = field.remote_field.through
+        return (
+            through,
+            through._meta.get_field(field.m2m_field_name()).attname,
+            through._meta.get_field(field.m2m_reverse_field_name()).attname,
+        )
+
+    def _get_linked(self, through, movie_attname, related_attname, movie_ids):
+        """Returns the ids of the objects already linked to each movie, in
+        insertion order."""
+        linked = defaultdict(list)
+        size = (
+            db.connections[self.db].features.max_query_params
+            or len(movie_ids)
+        )
+        for start in range(0, len(movie_ids), size):
+            rows = through.objects.filter(
+                **{f'{movie_attname}__in': movie_ids[start:start + size]}
+            ).order_by('pk').values_list(movie_attname, related_attname)
+            for movie_id, related_id in rows:
+                linked[movie_id].append(related_id)
+        return linked
+
+    def add_positioned(self, field_name, items, check_existing=True):
+        """Adds positioned contributors to many movies with a single bulk
+        insertion.
+
+        items is a list of (movie, contributors) pairs where movies and
+        contributors are instances or ids, and field_name is one of
+        'directors', 'writers' or 'actors'. The contributors of a movie are
+        numbered after the ones it already has, and contributors already
+        linked to the movie are skipped without shifting the next positions.
+        The existing links are fetched with a single query, which can be
+        avoided with check_existing=False for movies just created.
+        """
+        self._add_links(field_name, items, check_existing, positioned=True)
+
+    def add_related(self, field_name, items, check_existing=True):
+        """Adds related objects to many movies with a single bulk insertion.
+
+        items is a list of (movie, objects) pairs where movies and objects are
+        instances or ids, and field_name is one of 'genres', 'countries' or
+        'languages'. Objects already linked to a movie are skipped. The
+        existing links are fetched with a single query, which can be avoided
+        with check_existing=False for movies just created.
+        """
+        self._add_links(field_name, items, check_existing, positioned=False)
+
+    def _add_links(self, field_name, items, check_existing, positioned):
+        """Inserts the missing rows of a through table in bulk."""
+        through, movie_attname, related_attname = self._get_through(
+            field_name
+        )
+        items = [
+            (_pk(movie), [_pk(obj) for obj in objs]) for movie, objs in items
+        ]
+        linked = defaultdict(list)
+        if check_existing:
+            linked = self._get_linked(
+                through,
+                movie_attname,
+                related_attname,
+                [movie_id for movie_id, _ in items],
+            )
+        rows = []
+        for movie_id, related_ids in items:
+            seen = set(linked[movie_id])
+            start = len(linked[movie_id]) + 1
+            for position, related_id in enumerate(related_ids, start=start):
+                if related_id in seen:
+                    continue
+                seen.add(related_id)
+                linked[movie_id].append(related_id)
+                values = {movie_attname: movie_id, related_attname: related_id}
+                if positioned:
+                    values['position'] = position
+                rows.append(through(**values))
+        through.objects.bulk_create(rows)
+
+    def with_names(self, *field_names):
+        """Returns the movies with the objects of the given many to many
+        fields prefetched, i.e. with one query per field for a whole page of
+        movies rather than one query per field and movie.
+
+        The contributors of the positioned fields are ordered by position,
+        the other related objects keep their default ordering.
+        """
+        lookups = []
+        for field_name in field_names:
+            field = self.model._meta.get_field(field_name)
+            through = field.remote_field.through
+            queryset = field.related_model.objects.all()
+            if any(f.name == 'position' for f in through._meta.fields):
+                related = through._meta.get_field(
+                    field.m2m_reverse_field_name()
+                )
+                queryset = queryset.order_by(
+                    f'{related.related_query_name()}__position'
+                )
+            lookups.append(db.models.Prefetch(field_name, queryset=queryset))
+        return self.get_queryset().prefetch_related(*lookups)
+
     def create_movie(
         self,
         movie_info,
@@ -73,3 +256,152 @@ class MovieManager(db.models.Manager):
         movie.add_actors(*actors)
         movie.add_countries(*countries)
         movie.add_languages(*languages)
+
+
+class MovieCardManager(db.models.Manager):
+    """Manager responsible of handling the precomputed list representations
+    of the movies."""
+
+    def rebuild(self, batch_size=1000, movie_ids=None):
+        """Replaces every card with the list representation of the current
+        movies, rendered batch by batch, and returns the number of cards.
+
+        With movie_ids, only the cards of these movies are replaced, e.g. of
+        the movies inserted or updated by an incremental ingestion, and the
+        number of replaced cards is returned. The cards of deleted movies are
+        deleted with them.
+        """
+        n_cards = 0
+        with db.transaction.atomic(using=self.db):
+            if movie_ids is None:
+                self.all().delete()
+                last_id = 0
+                while batch := list(
+                    self._get_movies()
+                    .filter(id__gt=last_id)
+                    .order_by('id')[:batch_size]
+                ):
+                    n_cards += self._create_cards(batch)
+                    last_id = batch[-1].id
+                return n_cards
+            movie_ids = sorted(set(movie_ids))
+            for start in range(0, len(movie_ids), batch_size):
+                ids = movie_ids[start:start + batch_size]
+                self.filter(movie_id__in=ids).delete()
+                batch = list(
+                    self._get_movies().filter(id__in=ids).order_by('id')
+                )
+                n_cards += self._create_cards(batch)
+        return n_cards
+
+    def _get_movies(self):
+        """Returns the movies with the related objects of their cards
+        prefetched."""
+        from movies.serializers import MovieCardSerializer
+
+        movies = self.model._meta.get_field('movie').related_model.objects
+        return movies.with_names(*MovieCardSerializer.related_fields)
+
+    def _create_cards(self, batch):
+        """Renders and inserts the cards of a batch of movies and returns
+        their number."""
+        from movies.serializers import MovieCardSerializer
+
+        self.bulk_create(
+            self.model(movie_id=movie.id, payload=data)
+            for movie, data in zip(
+                batch, MovieCardSerializer(batch, many=True).data
+            )
+        )
+        return len(batch)
+
+
+class LeaderboardEntryManager(db.models.Manager):
+    """Manager responsible of handling the precomputed leaderboards of the
+    best-rated movies."""
+
+    def rebuild(self, size=100, min_votes=1000):
+        """Replaces the leaderboards with the size movies of best imdb score
+        overall, of each genre and of each decade, among the movies having at
+        least min_votes votes, and returns the number of entries.
+
+        Movies with the same score are ranked by decreasing id, like with
+        sort_by=-imdb_score on the titles list endpoint. Each leaderboard is
+        ranked by a single query numbering the rows of its partitions.
+        """
+        from movies.serializers import MovieCardSerializer
+
+        movies = self.model._meta.get_field('movie').related_model.objects
+        candidates = movies.filter(
+            votes__gte=min_votes, imdb_score__isnull=False
+        )
+        keys = {
+            'all': db.models.Value(''),
+            'genre': db.models.F('genres__name_key'),
+            'decade': db.models.functions.Cast(
+                db.models.F('year') / 10 * 10, db.models.CharField()
+            ),
+        }
+        rows = []
+        for board, key in keys.items():
+            ranked = (
+                candidates.annotate(
+                    key=key,
+                    rank=db.models.Window(
+                        db.models.functions.RowNumber(),
+                        partition_by=[key],
+                        order_by=[
+                            db.models.F('imdb_score').desc(),
+                            db.models.F('id').desc(),
+                        ],
+                    ),
+                )
+                .filter(key__isnull=False, rank__lte=size)
+                .values_list('key', 'rank', 'id')
+            )
+            rows.extend((board, *row) for row in ranked)
+
+        movie_ids = {movie_id for _, _, _, movie_id in rows}
+        payloads = dict(
+            models.MovieCard.objects.filter(movie_id__in=movie_ids)
+            .values_list('movie_id', 'payload')
+        )
+        # movies without a card, e.g. when the cards were not built yet
+        missing = movies.with_names(
+            *MovieCardSerializer.related_fields
+        ).filter(id__in=movie_ids - payloads.keys())
+        for data in MovieCardSerializer(missing, many=True).data:
+            payloads[data['id']] = data
+
+        with db.transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(
+                self.model(
+                    board=board,
+                    key=key,
+                    rank=rank,
+                    movie_id=movie_id,
+                    payload=payloads[movie_id],
+                )
+                for board, key, rank, movie_id in rows
+            )
+        return len(rows)
+
+
+class DatasetManager(db.models.Manager):
+    """Manager responsible of handling the single row describing the version
+    of the movies dataset."""
+
+    def current(self):
+        """Returns the dataset row, created on first access."""
+        dataset, _ = self.get_or_create(pk=1)
+        return dataset
+
+    def bump(self):
+        """Records a new version of the dataset after its content changed and
+        returns the updated dataset row."""
+        dataset = self.current()
+        dataset.version = db.models.F('version') + 1
+        dataset.save()
+        dataset.refresh_from_db()
+        return dataset
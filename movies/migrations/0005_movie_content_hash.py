@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_auto_20201214_0856'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='hash of the source data'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_movie_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(max_length=64, unique=True, verbose_name='sha256 hash of the source archive')),
+                ('last_row', models.IntegerField(verbose_name='number of the last committed row')),
+                ('completed', models.BooleanField(default=False, verbose_name='ingestion completed')),
+                ('dropped_indexes', models.JSONField(default=list, verbose_name='secondary indexes dropped during the ingestion')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='last update')),
+            ],
+            options={
+                'verbose_name_plural': 'ingestion checkpoints',
+                'ordering': ['-updated_at'],
+            },
+        ),
+    ]
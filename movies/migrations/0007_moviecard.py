@@ -0,0 +1,23 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_ingestioncheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieCard',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='movies.movie')),
+                ('payload', models.JSONField(verbose_name='list representation of the movie')),
+            ],
+            options={
+                'verbose_name_plural': 'movie cards',
+                'ordering': ['movie'],
+            },
+        ),
+    ]
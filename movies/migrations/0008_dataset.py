@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_moviecard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dataset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='dataset version')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='last update')),
+            ],
+            options={
+                'verbose_name_plural': 'dataset',
+            },
+        ),
+    ]
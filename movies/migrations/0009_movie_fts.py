@@ -0,0 +1,123 @@
+from django.db import migrations
+
+# Full-text index of the movie titles and descriptions, stored as an external
+# content FTS5 table reading its documents from movies_movie. The unicode61
+# tokenizer folds case and accents, prefix indexes speed up short prefixes
+# and the rank column weighs the title matches above the description ones.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE movies_movie_fts USING fts5(
+        title,
+        original_title,
+        description,
+        long_description,
+        content='movies_movie',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    INSERT INTO movies_movie_fts(movies_movie_fts, rank)
+    VALUES('rank', 'bm25(10.0, 5.0, 2.0, 1.0)')
+    """,
+    """
+    CREATE TRIGGER movies_movie_fts_insert AFTER INSERT ON movies_movie
+    BEGIN
+        INSERT INTO movies_movie_fts(
+            rowid, title, original_title, description, long_description
+        )
+        VALUES (
+            new.id,
+            new.title,
+            new.original_title,
+            new.description,
+            new.long_description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER movies_movie_fts_delete AFTER DELETE ON movies_movie
+    BEGIN
+        INSERT INTO movies_movie_fts(
+            movies_movie_fts,
+            rowid,
+            title,
+            original_title,
+            description,
+            long_description
+        )
+        VALUES (
+            'delete',
+            old.id,
+            old.title,
+            old.original_title,
+            old.description,
+            old.long_description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER movies_movie_fts_update AFTER UPDATE ON movies_movie
+    BEGIN
+        INSERT INTO movies_movie_fts(
+            movies_movie_fts,
+            rowid,
+            title,
+            original_title,
+            description,
+            long_description
+        )
+        VALUES (
+            'delete',
+            old.id,
+            old.title,
+            old.original_title,
+            old.description,
+            old.long_description
+        );
+        INSERT INTO movies_movie_fts(
+            rowid, title, original_title, description, long_description
+        )
+        VALUES (
+            new.id,
+            new.title,
+            new.original_title,
+            new.description,
+            new.long_description
+        );
+    END
+    """,
+    "INSERT INTO movies_movie_fts(movies_movie_fts) VALUES('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS movies_movie_fts_update',
+    'DROP TRIGGER IF EXISTS movies_movie_fts_delete',
+    'DROP TRIGGER IF EXISTS movies_movie_fts_insert',
+    'DROP TABLE IF EXISTS movies_movie_fts',
+]
+
+
+def _execute(statements):
+    """Returns a migration function executing the statements on SQLite
+    databases, the only ones supporting FTS5."""
+
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0008_dataset'),
+    ]
+
+    operations = [
+        migrations.RunPython(_execute(CREATE_SQL), _execute(DROP_SQL)),
+    ]
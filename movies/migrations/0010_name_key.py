@@ -0,0 +1,58 @@
+from django.db import migrations
+
+import movies.models
+
+NAMED_MODELS = [
+    'Company', 'Contributor', 'Country', 'Genre', 'Language', 'Rating'
+]
+
+
+def fill_name_keys(apps, schema_editor):
+    """Computes the name keys of the existing named entities."""
+    for model_name in NAMED_MODELS:
+        model = apps.get_model('movies', model_name)
+        objs = list(model.objects.only('id', 'name'))
+        for obj in objs:
+            obj.name_key = movies.models.fold_name(obj.name)
+        model.objects.bulk_update(objs, ['name_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0009_movie_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='name_key',
+            field=movies.models.NameKeyField(db_index=True, default='', editable=False, max_length=200, verbose_name='folded production company name'),
+        ),
+        migrations.AddField(
+            model_name='contributor',
+            name='name_key',
+            field=movies.models.NameKeyField(db_index=True, default='', editable=False, max_length=200, verbose_name='folded contributor name'),
+        ),
+        migrations.AddField(
+            model_name='country',
+            name='name_key',
+            field=movies.models.NameKeyField(db_index=True, default='', editable=False, max_length=200, verbose_name='folded country name'),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='name_key',
+            field=movies.models.NameKeyField(db_index=True, default='', editable=False, max_length=200, verbose_name='folded genre name'),
+        ),
+        migrations.AddField(
+            model_name='language',
+            name='name_key',
+            field=movies.models.NameKeyField(db_index=True, default='', editable=False, max_length=200, verbose_name='folded language name'),
+        ),
+        migrations.AddField(
+            model_name='rating',
+            name='name_key',
+            field=movies.models.NameKeyField(db_index=True, default='', editable=False, max_length=200, verbose_name='folded rating name'),
+        ),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+from django.db import migrations
+
+# Substring index of the contributor names, stored as an external content
+# FTS5 table reading its documents from movies_contributor. The trigram
+# tokenizer indexes every sequence of three characters of the names, so any
+# case-insensitive substring of three characters or more is found from the
+# index rather than by scanning the names.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE movies_contributor_fts USING fts5(
+        name,
+        content='movies_contributor',
+        content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER movies_contributor_fts_insert
+    AFTER INSERT ON movies_contributor
+    BEGIN
+        INSERT INTO movies_contributor_fts(rowid, name)
+        VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER movies_contributor_fts_delete
+    AFTER DELETE ON movies_contributor
+    BEGIN
+        INSERT INTO movies_contributor_fts(movies_contributor_fts, rowid, name)
+        VALUES ('delete', old.id, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER movies_contributor_fts_update
+    AFTER UPDATE OF name ON movies_contributor
+    BEGIN
+        INSERT INTO movies_contributor_fts(movies_contributor_fts, rowid, name)
+        VALUES ('delete', old.id, old.name);
+        INSERT INTO movies_contributor_fts(rowid, name)
+        VALUES (new.id, new.name);
+    END
+    """,
+    "INSERT INTO movies_contributor_fts(movies_contributor_fts) "
+    "VALUES('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS movies_contributor_fts_update',
+    'DROP TRIGGER IF EXISTS movies_contributor_fts_delete',
+    'DROP TRIGGER IF EXISTS movies_contributor_fts_insert',
+    'DROP TABLE IF EXISTS movies_contributor_fts',
+]
+
+
+def _execute(statements):
+    """Returns a migration function executing the statements on SQLite
+    databases, the only ones supporting FTS5."""
+
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0010_name_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(_execute(CREATE_SQL), _execute(DROP_SQL)),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+# Indexes of the genres, countries and languages of the movies ordered by
+# related entity then movie, which the many to many fields do not provide.
+# They cover the queries counting the movies of each genre, country or
+# language, and the subqueries selecting the movies of one of them.
+RELATIONS = [
+    ('movies_movie_genres', 'genre_id'),
+    ('movies_movie_countries', 'country_id'),
+    ('movies_movie_languages', 'language_id'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0012_movie_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX {table}_related_idx '
+            f'ON {table} ({column}, movie_id)',
+            f'DROP INDEX {table}_related_idx',
+        )
+        for table, column in RELATIONS
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0013_movie_relation_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('all', 'overall'), ('genre', 'per genre'), ('decade', 'per decade')], max_length=10, verbose_name='kind of leaderboard')),
+                ('key', models.CharField(blank=True, default='', max_length=200, verbose_name='folded genre name or decade of the leaderboard')),
+                ('rank', models.PositiveIntegerField(verbose_name='rank of the movie, starting at 1')),
+                ('payload', models.JSONField(verbose_name='list representation of the movie')),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='movies.movie')),
+            ],
+            options={
+                'verbose_name_plural': 'leaderboard entries',
+                'ordering': ['board', 'key', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('board', 'key', 'rank'), name='leaderboard_board_key_rank_uniq')],
+            },
+        ),
+    ]
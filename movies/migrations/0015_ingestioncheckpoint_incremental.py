@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0014_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestioncheckpoint',
+            name='incremental',
+            field=models.BooleanField(default=False, verbose_name='ingestion updating the existing movies'),
+        ),
+    ]
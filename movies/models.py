@@ -6,12 +6,65 @@ related data (country, language, contributors, etc.).
 
 """
 
+import unicodedata
+
 from django.db import models
 from django.urls import reverse
 
 from . import managers
 
 
+def fold_name(name):
+    """Returns the case- and accent-folded form of a name, e.g. 'amelie' for
+    'Amélie', used as its lookup key."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    return ''.join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).casefold()
+
+
+class NameKeyField(models.CharField):
+    """Indexed case- and accent-folded copy of the name of an entity.
+
+    The key is computed from the source field each time the entity is saved,
+    bulk insertions included, so that case-insensitive lookups are answered
+    by an equality search on its index.
+    """
+
+    def __init__(self, *args, source='name', **kwargs):
+        self.source = source
+        kwargs.setdefault('max_length', 200)
+        kwargs.setdefault('db_index', True)
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.source != 'name':
+            kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = fold_name(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+# Fields the movies can be sorted by, each one backed by an index on the field
+# and the id, which breaks the ties of every ordering
+SORTABLE_FIELDS = [
+    'title',
+    'year',
+    'imdb_score',
+    'votes',
+    'avg_vote',
+    'date_published',
+    'duration',
+    'metascore',
+]
+
+
 class Movie(models.Model):
     """Represent movie info as extracted from the IMDb database."""
 
@@ -50,6 +103,9 @@ class Movie(models.Model):
         'number of reviews from critics', null=True
     )
     image_url = models.URLField('poster image url', null=True)
+    content_hash = models.CharField(
+        'hash of the source data', max_length=64, blank=True, default=''
+    )
 
     actors = models.ManyToManyField(
         'Contributor', through='MovieActor', related_name='movies_as_actor'
@@ -77,6 +133,10 @@ class Movie(models.Model):
     class Meta:
         ordering = ['id']
         verbose_name_plural = 'movies'
+        indexes = [
+            models.Index(fields=[name, 'id'], name=f'movie_{name}_id_idx')
+            for name in SORTABLE_FIELDS
+        ]
 
     def __str__(self):
         return f'{self.title} ({self.imdb_title_id})'
@@ -104,38 +164,27 @@ class Movie(models.Model):
 
     def add_directors(self, *directors):
         """Adds one or several positioned directors to the current movie."""
-        n_directors = self.directors.count()
-        for position, director in enumerate(directors, start=n_directors + 1):
-            self.directors.add(
-                director, through_defaults={'position': position}
-            )
+        Movie.objects.add_positioned('directors', [(self, directors)])
 
     def add_actors(self, *actors):
         """Adds one or several positioned actors to the current movie."""
-        n_actors = self.actors.count()
-        for position, actor in enumerate(actors, start=n_actors + 1):
-            self.actors.add(actor, through_defaults={'position': position})
+        Movie.objects.add_positioned('actors', [(self, actors)])
 
     def add_writers(self, *writers):
         """Adds one or several positioned writers to the current movie."""
-        n_writers = self.writers.count()
-        for position, writer in enumerate(writers, start=n_writers + 1):
-            self.writers.add(writer, through_defaults={'position': position})
+        Movie.objects.add_positioned('writers', [(self, writers)])
 
     def add_genres(self, *genres):
         """Adds one or several genres to the current movie."""
-        for genre in genres:
-            self.genres.add(genre)
+        Movie.objects.add_related('genres', [(self, genres)])
 
     def add_countries(self, *countries):
         """Adds one or several countries to the current movie."""
-        for country in countries:
-            self.countries.add(country)
+        Movie.objects.add_related('countries', [(self, countries)])
 
     def add_languages(self, *languages):
         """Adds one or several languages to the current movie."""
-        for language in languages:
-            self.languages.add(language)
+        Movie.objects.add_related('languages', [(self, languages)])
 
 
 class Contributor(models.Model):
@@ -145,6 +194,7 @@ class Contributor(models.Model):
     name = models.CharField(
         'contributor full name', max_length=200, unique=True
     )
+    name_key = NameKeyField('folded contributor name')
 
     objects = managers.UniqueNameManager()
 
@@ -221,6 +271,7 @@ class Genre(models.Model):
     """Represents the genre of the movie."""
 
     name = models.CharField('genre of the movie', max_length=200, unique=True)
+    name_key = NameKeyField('folded genre name')
 
     objects = managers.UniqueNameManager()
 
@@ -240,6 +291,7 @@ class Country(models.Model):
     """Represents the country where a movie was created."""
 
     name = models.CharField('country name', max_length=200, unique=True)
+    name_key = NameKeyField('folded country name')
 
     objects = managers.UniqueNameManager()
 
@@ -259,6 +311,7 @@ class Language(models.Model):
     """Represents a language for a movie or its translation."""
 
     name = models.CharField('language name', max_length=200, unique=True)
+    name_key = NameKeyField('folded language name')
 
     objects = managers.UniqueNameManager()
 
@@ -278,6 +331,7 @@ class Rating(models.Model):
     """Represents a rating attributed to a movie."""
 
     name = models.CharField('rating name', max_length=200, unique=True)
+    name_key = NameKeyField('folded rating name')
 
     objects = managers.UniqueNameManager()
 
@@ -299,6 +353,7 @@ class Company(models.Model):
     name = models.CharField(
         'production company name', max_length=200, unique=True
     )
+    name_key = NameKeyField('folded production company name')
 
     objects = managers.UniqueNameManager()
 
@@ -312,3 +367,114 @@ class Company(models.Model):
     def natural_key(self):
         """Returns the natural key used for fixture serialization."""
         return self.name
+
+
+class MovieCard(models.Model):
+    """Precomputed list representation of a movie, rebuilt by the create_db
+    command and served as is by the titles list endpoint."""
+
+    movie = models.OneToOneField(
+        'Movie',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='card',
+    )
+    payload = models.JSONField('list representation of the movie')
+
+    objects = managers.MovieCardManager()
+
+    class Meta:
+        ordering = ['movie']
+        verbose_name_plural = 'movie cards'
+
+    def __str__(self):
+        return f'Card of movie {self.movie_id}'
+
+
+class LeaderboardEntry(models.Model):
+    """Movie ranked in a precomputed leaderboard of the best-rated movies,
+    overall, of a genre or of a decade, rebuilt by the create_db command and
+    served as is by the titles top endpoint."""
+
+    BOARD_CHOICES = [
+        ('all', 'overall'),
+        ('genre', 'per genre'),
+        ('decade', 'per decade'),
+    ]
+
+    board = models.CharField(
+        'kind of leaderboard', max_length=10, choices=BOARD_CHOICES
+    )
+    key = models.CharField(
+        'folded genre name or decade of the leaderboard',
+        max_length=200,
+        blank=True,
+        default='',
+    )
+    rank = models.PositiveIntegerField('rank of the movie, starting at 1')
+    movie = models.ForeignKey(
+        'Movie', on_delete=models.CASCADE, related_name='leaderboard_entries'
+    )
+    payload = models.JSONField('list representation of the movie')
+
+    objects = managers.LeaderboardEntryManager()
+
+    class Meta:
+        ordering = ['board', 'key', 'rank']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'key', 'rank'],
+                name='leaderboard_board_key_rank_uniq',
+            )
+        ]
+        verbose_name_plural = 'leaderboard entries'
+
+    def __str__(self):
+        return f'#{self.rank} of {self.board} {self.key}'.rstrip()
+
+
+class Dataset(models.Model):
+    """Single row recording the version of the movies dataset, bumped by the
+    create_db command each time the movies are loaded."""
+
+    version = models.PositiveIntegerField('dataset version', default=0)
+    updated_at = models.DateTimeField('last update', auto_now=True)
+
+    objects = managers.DatasetManager()
+
+    class Meta:
+        verbose_name_plural = 'dataset'
+
+    def __str__(self):
+        return f'Dataset version {self.version}'
+
+    @property
+    def tag(self):
+        """Identifier of the dataset version, which stays unique when the
+        database is replaced by another one restarting the version count."""
+        return f'{self.version}.{self.updated_at.timestamp():.6f}'
+
+
+class IngestionCheckpoint(models.Model):
+    """Records the progress of the csv ingestion of a source archive, so that
+    an interrupted ingestion can be resumed."""
+
+    source_hash = models.CharField(
+        'sha256 hash of the source archive', max_length=64, unique=True
+    )
+    last_row = models.IntegerField('number of the last committed row')
+    completed = models.BooleanField('ingestion completed', default=False)
+    incremental = models.BooleanField(
+        'ingestion updating the existing movies', default=False
+    )
+    dropped_indexes = models.JSONField(
+        'secondary indexes dropped during the ingestion', default=list
+    )
+    updated_at = models.DateTimeField('last update', auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+        verbose_name_plural = 'ingestion checkpoints'
+
+    def __str__(self):
+        return f'{self.source_hash[:12]} (row {self.last_row})'
@@ -112,6 +112,47 @@ def transform_missing_image_to_none(movie):
     movie['image_url'] = value or None
 
 
+_NON_DIGITS = re.compile(r'\D')
+_DIGITS = re.compile(r'\d+')
+_BUDGET = re.compile(r'(?:(?P<currency>\D{3})\s+|\s*)(?P<value>\d+)')
+
+_UNKNOWN_FIELDS = (
+    'countries',
+    'genres',
+    'languages',
+    'directors',
+    'writers',
+    'production_company',
+    'actors',
+)
+
+_INCOME_AND_REVIEW_FIELDS = (
+    'usa_gross_income',
+    'worldwide_gross_income',
+    'reviews_from_users',
+    'reviews_from_critics',
+)
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return date.fromisoformat(f"{value}-01-01")
+
+
+def _parse_budget(value):
+    match = _BUDGET.match(value.replace('$', 'USD').upper())
+    if not match:
+        return None, None
+    return int(match.group('value')), match.group('currency') or 'USD'
+
+
+def _parse_first_int(value):
+    match = _DIGITS.search(value)
+    return int(match.group()) if match else None
+
+
 class MovieNormalizer:
     """Object normalizing movie information before insertion into database."""
 
@@ -140,4 +181,68 @@ class MovieNormalizer:
     def normalize_all(self, movies):
         """Normalizes each movie present in the provided list of movies."""
         for movie in movies:
-            self.normalize(movie)
\ No newline at end of file
+            self.normalize(movie)
+
+    def normalize_batch(self, movies):
+        """Normalizes a list of movies column by column.
+
+        Gives the same results as normalize_all, but each column is converted
+        in a single pass with precompiled patterns instead of running the
+        fourteen normalizers on every movie.
+        """
+        if not movies:
+            return
+
+        def column(key, default=None):
+            return [movie.pop(key, default) for movie in movies]
+
+        columns = {
+            'id': [int(value.strip('t')) for value in column('imdb_title_id')],
+            'year': [
+                int(_NON_DIGITS.sub('', value)) for value in column('year')
+            ],
+            'date_published': list(map(_parse_date, column('date_published'))),
+            'duration': list(map(int, column('duration'))),
+            'long_description': [
+                value if value.strip() else 'No long description provided'
+                for value in column('long_description')
+            ],
+            'avg_vote': [
+                Decimal(value.strip()) for value in column('avg_vote', '')
+            ],
+            'imdb_score': [
+                Decimal(value.strip()) for value in column('imdb_score', '')
+            ],
+            'metascore': [
+                Decimal(value) if value else None
+                for value in map(str.strip, column('metascore', ''))
+            ],
+            'votes': list(map(int, column('votes'))),
+            'rated': [
+                value or 'Not rated or unkown rating'
+                for value in map(str.strip, column('rated', ''))
+            ],
+            'image_url': [
+                value or None for value in map(str.strip, column('image_url'))
+            ],
+        }
+        for key in _UNKNOWN_FIELDS:
+            columns[key] = [
+                value if isinstance(value, str) and value.strip() else 'Unknown'
+                for value in column(key)
+            ]
+        budgets = list(map(_parse_budget, column('budget', '')))
+        columns['budget'] = [budget for budget, _ in budgets]
+        columns['budget_currency'] = [currency for _, currency in budgets]
+        for key in _INCOME_AND_REVIEW_FIELDS:
+            columns[key] = list(map(_parse_first_int, column(key, '')))
+
+        for key, values in columns.items():
+            for movie, value in zip(movies, values):
+                movie[key] = value
+
+    def normalize_chunk(self, movies):
+        """Normalizes a chunk of movies and returns it, so that the chunk can
+        be normalized in a worker process."""
+        self.normalize_batch(movies)
+        return movies
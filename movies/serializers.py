@@ -40,6 +40,20 @@ class MovieListSerializer(serializers.ModelSerializer):
         ]
 
 
+class MovieCardSerializer(MovieListSerializer):
+    """Serializer for the precomputed list representation of movies, i.e. the
+    list representation without the request dependent url."""
+
+    # Many to many fields rendered by the serializer
+    related_fields = ['directors', 'actors', 'writers', 'genres']
+
+    class Meta:
+        model = models.Movie
+        fields = [
+            field for field in MovieListSerializer.Meta.fields if field != 'url'
+        ]
+
+
 class MovieDetailSerializer(serializers.ModelSerializer):
     """Serializer for the list of movies."""
 
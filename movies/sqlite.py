@@ -0,0 +1,159 @@
+"""Implementation of the SQLite helpers.
+
+This module is part of the OCMovies-API project and implements helpers
+tuning the SQLite database used by the project, e.g. while the movies are
+loaded in bulk by the create_db command.
+
+"""
+
+from contextlib import contextmanager
+
+from django.db import connection
+
+# Pragmas favouring write throughput over durability while loading movies.
+# With WAL and synchronous=NORMAL, commits do not wait for an fsync and the
+# database stays consistent even on an OS crash or a power loss, which may
+# only lose the last committed chunks.
+BULK_LOAD_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -262144,
+    'temp_store': 'MEMORY',
+}
+
+# SQLite defaults, safe settings to serve the API once the load is done
+SERVING_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'cache_size': -2000,
+    'temp_store': 'DEFAULT',
+}
+
+
+def is_sqlite():
+    """Tells whether the default database is a SQLite database."""
+    return connection.vendor == 'sqlite'
+
+
+def set_pragmas(pragmas):
+    """Applies the pragmas to the current connection and returns the values
+    reported back by SQLite."""
+    applied = {}
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+            cursor.execute(f'PRAGMA {name}')
+            applied[name] = cursor.fetchone()[0]
+    return applied
+
+
+def _get_schema_objects(kind, prefix):
+    """Returns the name and creation sql of the schema objects of a kind on
+    the tables whose name starts with prefix."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = %s AND sql IS NOT NULL AND tbl_name LIKE %s "
+            "ORDER BY name",
+            [kind, f'{prefix}%'],
+        )
+        return cursor.fetchall()
+
+
+def get_secondary_indexes(prefix='movies_'):
+    """Returns the name and creation sql of the explicit indexes on the tables
+    whose name starts with prefix.
+
+    The indexes backing primary keys and unique constraints are created
+    implicitly by SQLite, have no sql and cannot be dropped.
+    """
+    return _get_schema_objects('index', prefix)
+
+
+def get_triggers(prefix='movies_'):
+    """Returns the name and creation sql of the triggers on the tables whose
+    name starts with prefix, e.g. the ones keeping full-text indexes in
+    sync."""
+    return _get_schema_objects('trigger', prefix)
+
+
+def get_fts_tables(prefix='movies_'):
+    """Returns the names of the FTS5 virtual tables whose name starts with
+    prefix."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'table' AND name LIKE %s "
+            "AND sql LIKE 'CREATE VIRTUAL TABLE%%USING fts5%%' "
+            "ORDER BY name",
+            [f'{prefix}%'],
+        )
+        return [name for name, in cursor.fetchall()]
+
+
+def rebuild_fts_tables(prefix='movies_'):
+    """Rebuilds the FTS5 tables from their content tables and returns their
+    names."""
+    tables = get_fts_tables(prefix)
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(
+                f'INSERT INTO "{table}"("{table}") VALUES(\'rebuild\')'
+            )
+    return tables
+
+
+@contextmanager
+def bulk_load_profile(drop_indexes=True, dropped=()):
+    """Runs a block under the bulk load settings.
+
+    The bulk load pragmas are applied and, if drop_indexes is set, the
+    secondary indexes and the triggers of the movies tables are dropped. The
+    indexes and triggers in dropped, left over by an interrupted load, are
+    rebuilt as well. On exit, the indexes and triggers are rebuilt, the
+    full-text indexes they keep in sync are rebuilt from scratch, the
+    statistics of the query planner refreshed with ANALYZE and the serving
+    pragmas restored. Yields a dictionary describing the applied settings.
+    """
+    if not is_sqlite():
+        yield {}
+        return
+    profile = {
+        'pragmas': set_pragmas(BULK_LOAD_PRAGMAS),
+        'indexes': [],
+        'triggers': [],
+    }
+    existing = {
+        'INDEX': get_secondary_indexes(),
+        'TRIGGER': get_triggers(),
+    }
+    # indexes and triggers dropped by an interrupted load, never rebuilt
+    leftovers = {name: (name, sql) for name, sql in dropped}
+    for objects in existing.values():
+        for name, _ in objects:
+            leftovers.pop(name, None)
+    dropped_objects = {'INDEX': [], 'TRIGGER': []}
+    for name, sql in leftovers.values():
+        is_trigger = sql.lstrip().upper().startswith('CREATE TRIGGER')
+        dropped_objects['TRIGGER' if is_trigger else 'INDEX'].append(
+            (name, sql)
+        )
+    if drop_indexes:
+        with connection.cursor() as cursor:
+            for kind, objects in existing.items():
+                for name, sql in objects:
+                    cursor.execute(f'DROP {kind} "{name}"')
+                    dropped_objects[kind].append((name, sql))
+    profile['indexes'] = sorted(dropped_objects['INDEX'])
+    profile['triggers'] = sorted(dropped_objects['TRIGGER'])
+    try:
+        yield profile
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in profile['indexes'] + profile['triggers']:
+                cursor.execute(sql)
+        if profile['triggers']:
+            profile['fts_tables'] = rebuild_fts_tables()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        profile['serving_pragmas'] = set_pragmas(SERVING_PRAGMAS)
@@ -0,0 +1,192 @@
+"""Implementation of the synthetic movies csv generator.
+
+This module is part of the OCMovies-API project and implements a generator
+of zipped csv files shaped like data/movies.csv.zip, with any number of rows
+and name cardinalities close to the ones of the IMDb data, used to benchmark
+the ingestion of movies.
+
+"""
+
+import csv
+from io import TextIOWrapper
+import random
+from zipfile import ZIP_DEFLATED, ZipFile
+
+COLUMNS = [
+    'imdb_title_id',
+    'title',
+    'original_title',
+    'year',
+    'date_published',
+    'genres',
+    'duration',
+    'countries',
+    'languages',
+    'directors',
+    'writers',
+    'production_company',
+    'actors',
+    'description',
+    'avg_vote',
+    'votes',
+    'budget',
+    'usa_gross_income',
+    'worldwide_gross_income',
+    'metascore',
+    'reviews_from_users',
+    'reviews_from_critics',
+    'rated',
+    'long_description',
+    'image_url',
+    'imdb_score',
+]
+
+GENRES = [
+    'Drama', 'Comedy', 'Romance', 'Action', 'Thriller', 'Crime', 'Horror',
+    'Adventure', 'Mystery', 'Family', 'Fantasy', 'Sci-Fi', 'Biography',
+    'History', 'War', 'Music', 'Animation', 'Musical', 'Western', 'Sport',
+    'Film-Noir', 'Documentary', 'Adult', 'Reality-TV', 'News',
+]
+
+RATINGS = [
+    'Not Rated', 'R', 'PG-13', 'PG', 'G', 'Approved', 'Passed', 'Unrated',
+    'TV-MA', 'TV-14', 'TV-PG', 'NC-17', 'X', 'M', 'GP',
+]
+
+CURRENCIES = ['$', 'EUR', 'GBP', 'INR', 'JPY', 'FRF', 'CAD']
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael',
+    'Linda', 'William', 'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan',
+    'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen', 'Akira',
+    'Zoé', 'François', 'Jürgen', 'Ingrid', 'Satyajit', 'Pedro', 'Agnès',
+    'Wong', 'Federico', 'Sofia', 'Hayao',
+]
+
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller',
+    'Davis', 'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez',
+    'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Kurosawa', 'Varda', 'Fellini', 'Almodóvar', 'Bergman', 'Ray', 'Kar-wai',
+    'Miyazaki', 'Coppola', 'Truffaut', 'Müller', 'Dupont',
+]
+
+WORDS = [
+    'night', 'love', 'man', 'day', 'last', 'house', 'blood', 'city', 'dark',
+    'girl', 'story', 'life', 'world', 'dead', 'time', 'return', 'secret',
+    'king', 'war', 'family', 'summer', 'road', 'heart', 'star', 'river',
+]
+
+
+class _Pool:
+    """Pool of names picked with a skewed distribution: a few names are very
+    frequent while most names appear once or twice, as in the IMDb data."""
+
+    def __init__(self, rnd, size, make_name):
+        self.rnd = rnd
+        self.size = max(size, 1)
+        self.make_name = make_name
+
+    def pick(self, k=1):
+        # log-uniform ranks approximate a Zipf distribution of exponent 1
+        ranks = {int(self.size ** self.rnd.random()) - 1 for _ in range(k)}
+        return ', '.join(self.make_name(rank) for rank in sorted(ranks))
+
+
+def _person(rank):
+    first = FIRST_NAMES[rank % len(FIRST_NAMES)]
+    last = LAST_NAMES[rank // len(FIRST_NAMES) % len(LAST_NAMES)]
+    batch = rank // (len(FIRST_NAMES) * len(LAST_NAMES))
+    return f'{first} {last} {batch}' if batch else f'{first} {last}'
+
+
+def generate_movies_csv(path, n_rows, seed=0):
+    """Writes a zipped movies.csv file of n_rows synthetic movies to path.
+
+    The pools of names grow with the number of rows in roughly the same
+    proportions as in the real data set (about 4.5 distinct contributors and
+    0.4 production company per movie).
+    """
+    rnd = random.Random(seed)
+    pools = {
+        'genres': _Pool(rnd, len(GENRES), GENRES.__getitem__),
+        'countries': _Pool(rnd, 190, lambda rank: f'Country {rank}'),
+        'languages': _Pool(rnd, 250, lambda rank: f'Language {rank}'),
+        'ratings': _Pool(rnd, len(RATINGS), RATINGS.__getitem__),
+        'contributors': _Pool(rnd, int(n_rows * 4.5), _person),
+        'companies': _Pool(
+            rnd, int(n_rows * 0.4), lambda rank: f'{_person(rank)} Pictures'
+        ),
+    }
+
+    with ZipFile(path, 'w', compression=ZIP_DEFLATED) as zf:
+        with zf.open('movies.csv', 'w', force_zip64=True) as outfile:
+            text = TextIOWrapper(outfile, 'utf-8', newline='')
+            writer = csv.DictWriter(text, fieldnames=COLUMNS)
+            writer.writeheader()
+            for row in range(1, n_rows + 1):
+                writer.writerow(_movie(rnd, row, pools))
+            text.flush()
+            text.detach()
+
+
+def _movie(rnd, row, pools):
+    """Builds a raw csv row for a synthetic movie."""
+    year = rnd.randint(1906, 2020)
+    title = ' '.join(rnd.sample(WORDS, rnd.randint(1, 4))).title()
+    score = rnd.randint(10, 99) / 10
+    budget = ''
+    if rnd.random() < 0.3:
+        budget = f'{rnd.choice(CURRENCIES)} {rnd.randint(10, 300000) * 1000}'
+    return {
+        'imdb_title_id': f'tt{row:07d}',
+        'title': title,
+        'original_title': title if rnd.random() < 0.8 else title.upper(),
+        'year': str(year),
+        'date_published': (
+            f'{year}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}'
+            if rnd.random() < 0.95 else str(year)
+        ),
+        'genres': pools['genres'].pick(rnd.randint(1, 3)),
+        'duration': str(rnd.randint(45, 200)),
+        'countries': pools['countries'].pick(rnd.randint(1, 3)),
+        'languages': (
+            pools['languages'].pick(rnd.randint(1, 3))
+            if rnd.random() < 0.99 else ''
+        ),
+        'directors': pools['contributors'].pick(rnd.randint(1, 2)),
+        'writers': pools['contributors'].pick(rnd.randint(1, 3)),
+        'production_company': (
+            pools['companies'].pick() if rnd.random() < 0.95 else ''
+        ),
+        'actors': pools['contributors'].pick(rnd.randint(5, 15)),
+        'description': f'A {" ".join(rnd.sample(WORDS, 8))}.',
+        'avg_vote': f'{score:.1f}',
+        'votes': str(int(100 * 10000 ** rnd.random())),
+        'budget': budget,
+        'usa_gross_income': (
+            f'$ {rnd.randint(1000, 900000000)}' if rnd.random() < 0.2 else ''
+        ),
+        'worldwide_gross_income': (
+            f'$ {rnd.randint(1000, 2800000000)}' if rnd.random() < 0.35
+            else ''
+        ),
+        'metascore': (
+            f'{rnd.randint(1, 100)}.0' if rnd.random() < 0.15 else ''
+        ),
+        'reviews_from_users': (
+            f'{rnd.randint(1, 10000)}.0' if rnd.random() < 0.9 else ''
+        ),
+        'reviews_from_critics': (
+            f'{rnd.randint(1, 1000)}.0' if rnd.random() < 0.85 else ''
+        ),
+        'rated': pools['ratings'].pick() if rnd.random() < 0.6 else '',
+        'long_description': (
+            ' '.join(rnd.choices(WORDS, k=40)) if rnd.random() < 0.7 else ''
+        ),
+        'image_url': (
+            f'https://m.media-amazon.com/images/M/{row}.jpg'
+            if rnd.random() < 0.9 else ''
+        ),
+        'imdb_score': f'{score:.1f}',
+    }
@@ -1,5 +1,8 @@
+import pytest
 from pytest_factoryboy import register
+from rest_framework.test import APIClient
 
+from api.v1.mixins import get_api_cache
 from movies import factories
 
 
@@ -9,4 +12,83 @@ register(factories.CountryFactory)
 register(factories.LanguageFactory)
 register(factories.RatingFactory)
 register(factories.CompanyFactory)
-register(factories.MovieFactory)
\ No newline at end of file
+register(factories.MovieFactory)
+
+
+@pytest.fixture
+def api_client():
+    """Returns a client of the API."""
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def api_cache():
+    """Empties the cache of the API responses around each test."""
+    cache = get_api_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture
+def raw_movies():
+    """Returns raw movie rows as read from the movies csv file."""
+
+    def _raw_movie(imdb_title_id, title, **kwargs):
+        movie = {
+            'imdb_title_id': imdb_title_id,
+            'title': title,
+            'original_title': title,
+            'year': '2009',
+            'date_published': '2009-12-16',
+            'genres': 'Action, Adventure, Fantasy',
+            'duration': '162',
+            'countries': 'USA',
+            'languages': 'English, Spanish',
+            'directors': 'James Cameron',
+            'writers': 'James Cameron',
+            'production_company': 'Twentieth Century Fox',
+            'actors': 'Sam Worthington, Zoe Saldana, Sigourney Weaver',
+            'description': 'A paraplegic Marine dispatched to the moon.',
+            'avg_vote': '7.8',
+            'votes': '1088452',
+            'budget': '$ 237000000',
+            'usa_gross_income': '$ 760507625',
+            'worldwide_gross_income': '$ 2790439092',
+            'metascore': '83.0',
+            'reviews_from_users': '3514.0',
+            'reviews_from_critics': '732.0',
+            'rated': 'PG-13',
+            'long_description': '',
+            'image_url': '',
+            'imdb_score': '7.9',
+        }
+        movie.update(kwargs)
+        return movie
+
+    return [
+        _raw_movie('tt0499549', 'Avatar'),
+        _raw_movie(
+            'tt0088247',
+            'The Terminator',
+            year='1984',
+            date_published='1984',
+            genres='Action, Sci-Fi, Action',
+            actors='Arnold Schwarzenegger, Linda Hamilton, Michael Biehn',
+            writers='James Cameron, Gale Anne Hurd, James Cameron',
+            production_company='',
+            rated='',
+            metascore='',
+        ),
+        _raw_movie(
+            'tt0000009',
+            'Miss Jerry',
+            genres='Romance',
+            countries='',
+            languages='None',
+            directors='Alexander Black',
+            writers='Alexander Black',
+            actors='Blanche Bayliss, William Courtenay, Chauncey Depew',
+            budget='$ 2250',
+        ),
+    ]
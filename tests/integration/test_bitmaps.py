@@ -0,0 +1,110 @@
+import pytest
+from django.urls import reverse
+
+from api.v1.mixins import get_dataset
+from api.v1.titles.filters import TitleFilterSet
+from movies import bitmaps, models
+
+CATEGORICAL_PARAMS = [
+    {'genre': 'peplum'},
+    {'genre': 'PÉPLUM', 'country': 'rome antique'},
+    {'country': 'rome antique', 'lang': 'latin vulgaire'},
+    {'genre': 'peplum', 'lang': 'latin vulgaire', 'rating': 'tous publics'},
+    {'company': 'cinecitta'},
+    {'genre': 'peplum', 'company': 'cinecitta'},
+    {'genre': 'unknown genre'},
+]
+
+
+@pytest.fixture
+def movies(movie_factory):
+    """Returns movies sharing genres, countries, languages, ratings and
+    companies in various combinations."""
+    movies = movie_factory.create_batch(12)
+    peplum = models.Genre.objects.create(name='Péplum')
+    rome = models.Country.objects.create(name='Rome Antique')
+    latin = models.Language.objects.create(name='Latin Vulgaire')
+    rating = models.Rating.objects.create(name='Tous Publics')
+    company = models.Company.objects.create(name='Cinecittà')
+    for index, movie in enumerate(movies):
+        if index % 2:
+            movie.add_genres(peplum)
+        if index % 3:
+            movie.add_countries(rome)
+        if index % 4:
+            movie.add_languages(latin)
+        if index % 5 == 0:
+            movie.rated = rating
+        if index % 3 == 0:
+            movie.company = company
+        movie.save()
+    return movies
+
+
+@pytest.fixture(autouse=True)
+def bitmap_index():
+    bitmaps.clear_index()
+    yield
+    bitmaps.clear_index()
+
+
+def _sql_ids(params):
+    filterset = TitleFilterSet(params, queryset=models.Movie.objects.all())
+    return list(filterset.qs.values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+class TestMovieBitmapIndex:
+    """Integration tests on the movies bitmap index."""
+
+    @pytest.mark.parametrize('params', CATEGORICAL_PARAMS)
+    def test_selection_matches_sql_filters(self, movies, params):
+        filterset = TitleFilterSet(params, queryset=models.Movie.objects.all())
+        assert filterset.is_valid()
+        selection = filterset.get_bitmap_ids(get_dataset().tag)
+        assert list(selection) == _sql_ids(params)
+        assert selection.count() == len(_sql_ids(params))
+
+    @pytest.mark.parametrize(
+        'params',
+        [{}, {'genre': 'peplum', 'min_year': 2000}, {'genre_contains': 'pe'}],
+    )
+    def test_other_filters_are_not_answered(self, movies, params):
+        filterset = TitleFilterSet(params, queryset=models.Movie.objects.all())
+        assert filterset.is_valid()
+        assert filterset.get_bitmap_ids(get_dataset().tag) is None
+
+    def test_index_is_rebuilt_for_new_dataset(self, movies):
+        index = bitmaps.get_index('1.0')
+        assert bitmaps.get_index('1.0') is index
+        assert bitmaps.get_index('2.0') is not index
+
+
+@pytest.mark.django_db
+class TestMovieTitleListViewBitmapIndex:
+    """Integration tests on the titles list answered from the bitmap
+    index."""
+
+    @pytest.mark.parametrize('params', CATEGORICAL_PARAMS)
+    @pytest.mark.parametrize('page', [1, 2])
+    def test_pages_match_sql_pages(
+        self, api_client, movies, settings, api_cache, params, page
+    ):
+        params = {**params, 'page_size': 2, 'page': page}
+        expected = api_client.get(reverse('movie-list'), params)
+        api_cache.clear()
+        settings.API_BITMAP_INDEX = True
+        response = api_client.get(reverse('movie-list'), params)
+        assert response.status_code == expected.status_code
+        assert response.data == expected.data
+
+    def test_page_runs_only_cards_query(
+        self, api_client, movies, settings, django_assert_num_queries
+    ):
+        settings.API_BITMAP_INDEX = True
+        models.MovieCard.objects.rebuild()
+        bitmaps.get_index(get_dataset().tag)
+        params = {'genre': 'peplum', 'lang': 'latin vulgaire'}
+        with django_assert_num_queries(1):
+            response = api_client.get(reverse('movie-list'), params)
+        assert response.data['count'] == len(_sql_ids(params))
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from api.v1.mixins import get_dataset
+from api.v1.titles.filters import TitleFilterSet
+from movies import columns, models
+
+NUMERIC_PARAMS = [
+    {'min_year': 2001},
+    {'max_year': 2001, 'imdb_score_min': 7},
+    {'year': 2000, 'sort_by': '-imdb_score'},
+    {'min_year': 2000, 'sort_by': 'metascore'},
+    {'imdb_score_min': 1, 'sort_by': '-metascore'},
+    {'imdb_score_max': '6.1', 'sort_by': 'year,-metascore'},
+    {'min_year': 2001, 'sort_by': '-avg_vote,duration'},
+    {'max_year': 2002, 'sort_by': '-id'},
+]
+
+
+@pytest.fixture
+def movies(movie_factory):
+    """Returns movies with duplicate years and scores and some null
+    metascores."""
+    movies = movie_factory.create_batch(13)
+    for index, movie in enumerate(movies):
+        movie.year = 2000 + index % 3
+        movie.imdb_score = Decimal('7.5') if index % 2 else Decimal('6.1')
+        movie.metascore = None if index % 4 == 0 else Decimal(index % 5)
+        movie.save()
+    return movies
+
+
+@pytest.fixture(autouse=True)
+def movie_columns():
+    columns.clear_columns()
+    yield
+    columns.clear_columns()
+
+
+def _sql_ids(params):
+    filterset = TitleFilterSet(params, queryset=models.Movie.objects.all())
+    return list(filterset.qs.values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+class TestMovieColumns:
+    """Integration tests on the columnar snapshot of the movies."""
+
+    @pytest.mark.parametrize('params', NUMERIC_PARAMS)
+    def test_selection_matches_sql_filters(self, movies, params):
+        filterset = TitleFilterSet(params, queryset=models.Movie.objects.all())
+        assert filterset.is_valid()
+        selection = filterset.get_column_ids(get_dataset().tag)
+        expected = _sql_ids(params)
+        assert selection.count() == len(expected)
+        assert list(selection) == expected
+        assert selection[2:5] == expected[2:5]
+
+    @pytest.mark.parametrize(
+        'params',
+        [
+            {},
+            {'sort_by': '-votes'},
+            {'min_year': 2000, 'sort_by': 'title'},
+            {'min_year': 2000, 'genre': 'drama'},
+            {'title_contains': 'a', 'sort_by': '-votes'},
+        ],
+    )
+    def test_other_filters_are_not_answered(self, movies, params):
+        filterset = TitleFilterSet(params, queryset=models.Movie.objects.all())
+        assert filterset.is_valid()
+        assert filterset.get_column_ids(get_dataset().tag) is None
+
+
+@pytest.mark.django_db
+class TestMovieTitleListViewColumns:
+    """Integration tests on the titles list answered from the columnar
+    snapshot."""
+
+    @pytest.mark.parametrize('params', NUMERIC_PARAMS)
+    @pytest.mark.parametrize('page', [1, 3])
+    def test_pages_match_sql_pages(
+        self, api_client, movies, settings, api_cache, params, page
+    ):
+        params = {**params, 'page_size': 2, 'page': page}
+        expected = api_client.get(reverse('movie-list'), params)
+        api_cache.clear()
+        settings.API_COLUMNAR_SNAPSHOT = True
+        response = api_client.get(reverse('movie-list'), params)
+        assert response.status_code == expected.status_code
+        assert response.data == expected.data
+
+    def test_page_runs_only_cards_query(
+        self, api_client, movies, settings, django_assert_num_queries
+    ):
+        settings.API_COLUMNAR_SNAPSHOT = True
+        models.MovieCard.objects.rebuild()
+        columns.get_columns(get_dataset().tag)
+        with django_assert_num_queries(1):
+            response = api_client.get(
+                reverse('movie-list'),
+                {'min_year': 2001, 'sort_by': '-imdb_score', 'page': 2},
+            )
+        assert response.data['count'] == 8
+
+    def test_unknown_sort_key_is_rejected(self, api_client, movies, settings):
+        settings.API_COLUMNAR_SNAPSHOT = True
+        response = api_client.get(reverse('movie-list'), {'sort_by': 'budget'})
+        assert response.status_code == 400
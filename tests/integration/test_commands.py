@@ -0,0 +1,92 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError
+
+from movies import models
+from movies.management.commands import create_db
+from movies.synthetic import generate_movies_csv
+
+
+@pytest.mark.django_db
+class TestGetCheckpoint:
+    """Integration tests on the checkpoints of the create_db command."""
+
+    @pytest.mark.parametrize('incremental', [False, True])
+    def test_get_checkpoint_records_mode(self, incremental):
+        command = create_db.Command()
+        command.get_checkpoint('a' * 64, False, incremental)
+        checkpoint = command.get_checkpoint('a' * 64, True, incremental)
+        assert checkpoint.incremental is incremental
+
+    @pytest.mark.parametrize('incremental', [False, True])
+    def test_get_checkpoint_rejects_resume_in_other_mode(self, incremental):
+        command = create_db.Command()
+        command.get_checkpoint('a' * 64, False, incremental)
+        with pytest.raises(CommandError, match='--incremental'):
+            command.get_checkpoint('a' * 64, True, not incremental)
+
+    def test_get_checkpoint_resets_progress(self):
+        models.IngestionCheckpoint.objects.create(
+            source_hash='a' * 64, last_row=12, completed=True
+        )
+        checkpoint = create_db.Command().get_checkpoint('a' * 64, False)
+        assert checkpoint.last_row == 0
+        assert not checkpoint.completed
+
+
+@pytest.mark.django_db(transaction=True)
+class TestIncrementalIngestion:
+    """Integration tests on the incremental ingestions of the create_db
+    command."""
+
+    @pytest.fixture
+    def command(self, tmp_path, monkeypatch):
+        path = tmp_path / 'movies.csv.zip'
+        generate_movies_csv(path, 20, 0)
+        monkeypatch.setattr(create_db, 'CSV_PATH', str(path))
+        command = create_db.Command(stdout=StringIO())
+        command.top_options = {'size': 10, 'min_votes': 0}
+        return command
+
+    def test_unchanged_ingestion_keeps_dataset_version(self, command):
+        command.create_db_from_csv(10, 1, incremental=True)
+        version = models.Dataset.objects.current().version
+        command.create_db_from_csv(10, 1, incremental=True)
+        assert models.Dataset.objects.current().version == version
+        assert models.MovieCard.objects.count() == 20
+
+    def test_changed_ingestion_bumps_dataset_version(self, command):
+        command.create_db_from_csv(10, 1, incremental=True)
+        version = models.Dataset.objects.current().version
+        models.Movie.objects.filter(
+            pk=models.Movie.objects.first().pk
+        ).update(content_hash='')
+        command.create_db_from_csv(10, 1, incremental=True)
+        assert models.Dataset.objects.current().version == version + 1
+
+    def test_ingestion_with_other_top_options_bumps_dataset_version(
+        self, command
+    ):
+        command.create_db_from_csv(10, 1, incremental=True)
+        version = models.Dataset.objects.current().version
+        command.top_options = {'size': 5, 'min_votes': 0}
+        command.create_db_from_csv(10, 1, incremental=True)
+        assert models.Dataset.objects.current().version == version + 1
+        assert not models.LeaderboardEntry.objects.filter(rank__gt=5).exists()
+
+    def test_ingestion_failing_after_load_can_be_resumed(
+        self, command, monkeypatch
+    ):
+        def fail():
+            raise RuntimeError('leaderboards failed')
+
+        monkeypatch.setattr(command, 'build_leaderboards', fail)
+        with pytest.raises(RuntimeError):
+            command.create_db_from_csv(10, 1, incremental=True)
+        assert not models.IngestionCheckpoint.objects.get().completed
+        monkeypatch.delattr(command, 'build_leaderboards')
+        command.create_db_from_csv(10, 1, incremental=True, resume=True)
+        assert models.IngestionCheckpoint.objects.get().completed
+        assert models.LeaderboardEntry.objects.exists()
+        assert models.Dataset.objects.current().version == 1
@@ -0,0 +1,349 @@
+import re
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from api.v1.titles.filters import TitleFilterSet
+from movies import models
+from movies.models import SORTABLE_FIELDS
+
+
+def _search(params):
+    filterset = TitleFilterSet(params, queryset=models.Movie.objects.all())
+    return list(filterset.qs.values_list('title', flat=True))
+
+
+@pytest.mark.django_db
+class TestFullTextSearch:
+    """Integration tests on the q filter of the titles list."""
+
+    @pytest.fixture
+    def movies(self, movie_factory):
+        return [
+            movie_factory(title='Le Fabuleux Destin d\'Amélie Poulain'),
+            movie_factory(
+                title='Zorglub Returns',
+                description='Amelie meets the zorglub.',
+            ),
+            movie_factory(
+                title='Spirou',
+                original_title='Spirou et Fantasio contre Zorglub',
+            ),
+            movie_factory(
+                title='Marsupilami', long_description='Houba houba.'
+            ),
+        ]
+
+    @pytest.mark.parametrize('q', ['amelie', 'AMÉLIE', 'amél', 'AMEL'])
+    def test_q_folds_case_and_accents_and_matches_prefixes(self, movies, q):
+        assert _search({'q': q}) == [
+            'Le Fabuleux Destin d\'Amélie Poulain',
+            'Zorglub Returns',
+        ]
+
+    def test_q_searches_every_text_field(self, movies):
+        assert set(_search({'q': 'zorglub'})) == {
+            'Zorglub Returns',
+            'Spirou',
+        }
+        assert _search({'q': 'houba'}) == ['Marsupilami']
+
+    def test_q_ranks_title_matches_first(self, movies):
+        assert _search({'q': 'zorglub'}) == ['Zorglub Returns', 'Spirou']
+
+    def test_q_requires_every_word(self, movies):
+        assert _search({'q': 'zorglub fantasio'}) == ['Spirou']
+
+    def test_q_without_words_matches_nothing(self, movies):
+        assert _search({'q': '"*'}) == []
+
+    def test_sort_by_overrides_ranking(self, movies):
+        assert _search({'q': 'zorglub', 'sort_by': '-title'}) == [
+            'Zorglub Returns',
+            'Spirou',
+        ]
+        assert _search({'q': 'zorglub', 'sort_by': 'title'}) == [
+            'Spirou',
+            'Zorglub Returns',
+        ]
+
+    def test_q_combines_with_other_filters(self, movies):
+        assert _search({'q': 'zorglub', 'title_contains': 'spir'}) == [
+            'Spirou'
+        ]
+
+    def test_index_follows_updates_and_deletions(self, movies):
+        movie = movies[3]
+        movie.title = movie.original_title = 'Gaston Lagaffe'
+        movie.save()
+        assert _search({'q': 'marsupilami'}) == []
+        assert _search({'q': 'gaston'}) == ['Gaston Lagaffe']
+        movie.delete()
+        assert _search({'q': 'gaston'}) == []
+
+    def test_cursor_pagination_of_ranked_results_needs_sort_by(
+        self, api_client, movies
+    ):
+        params = {'q': 'zorglub', 'pagination': 'cursor'}
+        response = api_client.get(reverse('movie-list'), params)
+        assert response.status_code == 400
+        response = api_client.get(
+            reverse('movie-list'), {**params, 'sort_by': 'title'}
+        )
+        assert [result['title'] for result in response.data['results']] == [
+            'Spirou',
+            'Zorglub Returns',
+        ]
+
+
+NAME_FILTERS = [
+    ('director', 'movies_contributor'),
+    ('writer', 'movies_contributor'),
+    ('actor', 'movies_contributor'),
+    ('genre', 'movies_genre'),
+    ('country', 'movies_country'),
+    ('lang', 'movies_language'),
+    ('company', 'movies_company'),
+    ('rating', 'movies_rating'),
+]
+
+
+@pytest.mark.django_db
+class TestNameFilters:
+    """Integration tests on the exact name filters of the titles list."""
+
+    @pytest.fixture
+    def movie(self, movie_factory):
+        # the factory links movies to random existing entities, so the named
+        # entities are created after the other movies
+        movie_factory(title='Brazil')
+        movie = movie_factory(title='Delicatessen')
+        jeunet = models.Contributor.objects.create(name='Jean-Pierre Jeunet')
+        movie.add_directors(jeunet)
+        movie.add_writers(jeunet)
+        movie.add_actors(
+            models.Contributor.objects.create(name='Dominique Pinon')
+        )
+        movie.add_genres(models.Genre.objects.create(name='Comédie Noire'))
+        movie.add_countries(models.Country.objects.create(name='Hexagone'))
+        movie.add_languages(models.Language.objects.create(name='Français'))
+        movie.company = models.Company.objects.create(name='Constellation')
+        movie.rated = models.Rating.objects.create(name='Tous Publics')
+        movie.save()
+        return movie
+
+    @pytest.mark.parametrize(
+        'params',
+        [
+            {'director': 'jean-pierre jeunet'},
+            {'writer': 'JEAN-PIERRE JEUNET'},
+            {'actor': 'dominique pinon'},
+            {'genre': 'comedie noire'},
+            {'country': 'HEXAGONE'},
+            {'lang': 'francais'},
+            {'company': 'constellation'},
+            {'rating': 'TOUS PUBLICS'},
+        ],
+    )
+    def test_name_filters_fold_case_and_accents(self, movie, params):
+        assert _search(params) == ['Delicatessen']
+
+    def test_name_filters_match_whole_names(self, movie):
+        assert _search({'director': 'jeunet'}) == []
+
+    @pytest.mark.parametrize('name, table', NAME_FILTERS)
+    def test_name_filters_search_name_key_index(self, movie, name, table):
+        filterset = TitleFilterSet(
+            {name: 'Jeunet'}, queryset=models.Movie.objects.all()
+        )
+        plan = filterset.qs.explain()
+        assert re.search(
+            rf'SEARCH \w+ USING (COVERING )?INDEX {table}_name_key_', plan
+        ), plan
+        assert f'SCAN {table}' not in plan
+
+
+@pytest.mark.django_db
+class TestContributorContainsFilters:
+    """Integration tests on the contributor substring filters of the titles
+    list."""
+
+    @pytest.fixture
+    def movies(self, movie_factory):
+        spirou = movie_factory(title='Spirou')
+        marsupilami = movie_factory(title='Marsupilami')
+        zorglub = models.Contributor.objects.create(name='Zorglub Champignac')
+        zorglubette = models.Contributor.objects.create(
+            name='Zorglubette Champignac'
+        )
+        spirou.add_directors(zorglub, zorglubette)
+        spirou.add_actors(
+            models.Contributor.objects.create(name='Fantasio Champignac')
+        )
+        marsupilami.add_writers(zorglubette)
+        return spirou, marsupilami
+
+    @pytest.mark.parametrize(
+        'params, titles',
+        [
+            ({'director_contains': 'RGLUB CHAMP'}, ['Spirou']),
+            ({'writer_contains': 'glubette'}, ['Marsupilami']),
+            ({'actor_contains': 'fantasio'}, ['Spirou']),
+            ({'actor_contains': 'zorglub'}, []),
+            ({'director_contains': '"zorglub'}, []),
+        ],
+    )
+    def test_contains_filters_match_substrings_in_role(
+        self, movies, params, titles
+    ):
+        assert _search(params) == titles
+
+    @pytest.mark.parametrize('value', ['champignac', 'ac'])
+    def test_contains_filters_return_each_movie_once(self, movies, value):
+        assert _search({'director_contains': value}).count('Spirou') == 1
+
+    def test_index_follows_new_and_renamed_contributors(self, movies):
+        spirou, marsupilami = movies
+        marsupilami.add_actors(
+            models.Contributor.objects.create(name='Gaston Lagaffe')
+        )
+        assert _search({'actor_contains': 'lagaf'}) == ['Marsupilami']
+        fantasio = models.Contributor.objects.get(name='Fantasio Champignac')
+        fantasio.name = 'Seccotine Champignac'
+        fantasio.save()
+        assert _search({'actor_contains': 'fantasio'}) == []
+        assert _search({'actor_contains': 'seccotine'}) == ['Spirou']
+
+    @pytest.mark.parametrize(
+        'name', ['director_contains', 'writer_contains', 'actor_contains']
+    )
+    def test_contains_filters_search_trigram_index(self, movies, name):
+        filterset = TitleFilterSet(
+            {name: 'zorglub'}, queryset=models.Movie.objects.all()
+        )
+        plan = filterset.qs.explain()
+        assert 'SCAN movies_contributor_fts VIRTUAL TABLE' in plan, plan
+        assert not re.search(r'SCAN movies_contributor\b', plan), plan
+
+
+@pytest.mark.django_db
+class TestSortBy:
+    """Integration tests on the sort_by filter of the titles list."""
+
+    @pytest.fixture
+    def movies(self, movie_factory):
+        movies = movie_factory.create_batch(4)
+        for index, movie in enumerate(movies):
+            movie.imdb_score = Decimal('7.5') if index % 2 else Decimal('6.1')
+            movie.save()
+        return movies
+
+    def _ids(self, params):
+        filterset = TitleFilterSet(params, queryset=models.Movie.objects.all())
+        return list(filterset.qs.values_list('id', flat=True))
+
+    def test_sort_by_breaks_ties_with_id_in_last_direction(self, movies):
+        ascending = sorted(
+            movies, key=lambda movie: (movie.imdb_score, movie.id)
+        )
+        assert self._ids({'sort_by': 'imdb_score'}) == [
+            movie.id for movie in ascending
+        ]
+        assert self._ids({'sort_by': '-IMDB_Score'}) == [
+            movie.id for movie in reversed(ascending)
+        ]
+
+    @pytest.mark.parametrize(
+        'sort_by', ['budget', 'genres__name', 'rated__name', 'title,', '--id']
+    )
+    def test_unknown_sort_keys_are_rejected(self, api_client, movies, sort_by):
+        response = api_client.get(reverse('movie-list'), {'sort_by': sort_by})
+        assert response.status_code == 400
+        assert 'sort_by' in response.data
+
+    @pytest.mark.parametrize(
+        'params, index',
+        [
+            *[
+                ({'sort_by': f'{direction}{field}'}, f'movie_{field}_id_idx')
+                for field in SORTABLE_FIELDS
+                for direction in ('', '-')
+            ],
+            (
+                {'imdb_score_min': 7, 'sort_by': '-imdb_score'},
+                'movie_imdb_score_id_idx',
+            ),
+            ({'min_year': 2000, 'sort_by': 'year'}, 'movie_year_id_idx'),
+            (
+                {'title_contains': 'love', 'sort_by': 'title'},
+                'movie_title_id_idx',
+            ),
+        ],
+    )
+    def test_sort_by_scans_covering_index(self, params, index):
+        filterset = TitleFilterSet(params, queryset=models.Movie.objects.all())
+        plan = filterset.qs.values_list('id', flat=True)[:5].explain()
+        assert f'USING COVERING INDEX {index}' in plan, plan
+        assert 'TEMP B-TREE' not in plan, plan
+
+
+@pytest.mark.django_db
+class TestRelatedFilters:
+    """Integration tests on the combinations of filters on the entities
+    related to the movies."""
+
+    @pytest.fixture
+    def movie(self, movie_factory):
+        movie_factory.create_batch(3)
+        movie = movie_factory(title='Ben-Hur')
+        movie.add_genres(
+            models.Genre.objects.create(name='Peplum'),
+            models.Genre.objects.create(name='Peplum Biblique'),
+        )
+        movie.add_countries(
+            models.Country.objects.create(name='Rome Antique'),
+            models.Country.objects.create(name='Rome Impériale'),
+        )
+        movie.add_languages(
+            models.Language.objects.create(name='Latin Classique'),
+            models.Language.objects.create(name='Latin Vulgaire'),
+        )
+        movie.add_actors(
+            models.Contributor.objects.create(name='Charlton Hestonix'),
+            models.Contributor.objects.create(name='Stephen Hestonix'),
+        )
+        return movie
+
+    @pytest.mark.parametrize(
+        'params',
+        [
+            {'genre_contains': 'peplum'},
+            {'genre_contains': 'peplum', 'country_contains': 'rome'},
+            {
+                'genre_contains': 'peplum',
+                'country_contains': 'rome',
+                'lang_contains': 'latin',
+                'actor_contains': 'hestonix',
+            },
+            {'genre': 'peplum', 'lang_contains': 'latin'},
+        ],
+    )
+    def test_combined_filters_return_each_movie_once(
+        self, api_client, movie, params
+    ):
+        assert _search(params) == ['Ben-Hur']
+        response = api_client.get(reverse('movie-list'), params)
+        assert response.data['count'] == 1
+        assert [result['id'] for result in response.data['results']] == [
+            movie.id
+        ]
+
+    def test_combined_filters_compile_to_subqueries(self, movie):
+        filterset = TitleFilterSet(
+            {'genre': 'peplum', 'country': 'rome antique', 'lang': 'latin'},
+            queryset=models.Movie.objects.all(),
+        )
+        sql = str(filterset.qs.query)
+        assert 'JOIN' not in sql.split(' WHERE ')[0]
+        assert sql.count('"movies_movie"."id" IN (SELECT') == 3
@@ -0,0 +1,148 @@
+import pytest
+from django.db import IntegrityError
+
+from movies import models
+from movies.loaders import MovieBulkLoader
+from movies.normalizers import MovieNormalizer
+
+
+def _normalized(raw_movies):
+    movies = [dict(movie) for movie in raw_movies]
+    MovieNormalizer().normalize_all(movies)
+    return movies
+
+
+def _snapshot():
+    """Returns the content of the database as comparable python values."""
+    return [
+        (
+            {
+                field.name: getattr(movie, field.name)
+                for field in models.Movie._meta.concrete_fields
+                if field.name not in ('company', 'rated', 'content_hash')
+            },
+            str(movie.company),
+            str(movie.rated),
+            [
+                (str(row.director), row.position)
+                for row in movie.moviedirectors.order_by('position')
+            ],
+            [
+                (str(row.writer), row.position)
+                for row in movie.moviewriters.order_by('position')
+            ],
+            [
+                (str(row.actor), row.position)
+                for row in movie.movieactors.order_by('position')
+            ],
+            [str(genre) for genre in movie.genres.all()],
+            [str(country) for country in movie.countries.all()],
+            [str(language) for language in movie.languages.all()],
+        )
+        for movie in models.Movie.objects.all()
+    ]
+
+
+@pytest.mark.django_db
+class TestMovieBulkLoader:
+    """Integration tests on the MovieBulkLoader methods."""
+
+    def test_load_returns_ids_of_movies(self, raw_movies):
+        loader = MovieBulkLoader()
+        movies = _normalized(raw_movies)
+        assert loader.load(movies) == [movie['id'] for movie in movies]
+        assert models.Movie.objects.count() == len(raw_movies)
+
+    def test_load_matches_create_movie(self, raw_movies):
+        """Verifies that the bulk loader builds exactly the same database as
+        the row by row create_movie method."""
+        for movie_info in _normalized(raw_movies):
+            models.Movie.objects.create_movie(movie_info)
+        expected = _snapshot()
+        models.Movie.objects.all().delete()
+
+        MovieBulkLoader().load(_normalized(raw_movies))
+        assert _snapshot() == expected
+
+    def test_load_reuses_existing_names(self, raw_movies):
+        models.Genre.objects.create(name='Action')
+        MovieBulkLoader().load(_normalized(raw_movies))
+        assert models.Genre.objects.filter(name='Action').count() == 1
+        assert models.Contributor.objects.filter(
+            name='James Cameron'
+        ).count() == 1
+
+    def test_load_uses_constant_number_of_queries(
+        self, raw_movies, django_assert_max_num_queries
+    ):
+        """Verifies that the number of queries does not depend on the number
+        of movies in the chunk."""
+        movies = _normalized(raw_movies)
+        with django_assert_max_num_queries(30):
+            MovieBulkLoader().load(movies)
+
+    def test_load_stores_content_hash(self, raw_movies):
+        MovieBulkLoader().load(_normalized(raw_movies))
+        hashes = models.Movie.objects.values_list('content_hash', flat=True)
+        assert all(len(value) == 64 for value in hashes)
+        assert len(set(hashes)) == len(raw_movies)
+
+    def test_upsert_inserts_updates_and_skips_movies(self, raw_movies):
+        loader = MovieBulkLoader()
+        loader.load(_normalized(raw_movies[:2]))
+        raw_movies[0]['actors'] = 'Zoe Saldana, Sam Worthington'
+        raw_movies[0]['genres'] = 'Sci-Fi'
+        raw_movies[0]['imdb_score'] = '8.1'
+
+        movies = _normalized(raw_movies)
+        counts = loader.upsert(movies)
+
+        assert counts == ([movies[2]['id']], [movies[0]['id']], 1)
+        movie = models.Movie.objects.get(title='Avatar')
+        assert str(movie.imdb_score) == '8.1'
+        assert [
+            (str(row.actor), row.position)
+            for row in movie.movieactors.order_by('position')
+        ] == [('Zoe Saldana', 1), ('Sam Worthington', 2)]
+        assert [str(genre) for genre in movie.genres.all()] == ['Sci-Fi']
+        assert models.Movie.objects.count() == 3
+
+    def test_upsert_leaves_unchanged_movies_alone(
+        self, raw_movies, django_assert_num_queries
+    ):
+        loader = MovieBulkLoader()
+        loader.load(_normalized(raw_movies))
+        # one select of the content hashes, plus the savepoint statements
+        with django_assert_num_queries(3):
+            counts = loader.upsert(_normalized(raw_movies))
+        assert counts == ([], [], len(raw_movies))
+
+    def test_delete_missing_deletes_vanished_movies(self, raw_movies):
+        loader = MovieBulkLoader()
+        loader.load(_normalized(raw_movies))
+        assert loader.delete_missing([499549, 88247]) == 1
+        assert list(models.Movie.objects.values_list('id', flat=True)) == [
+            88247,
+            499549,
+        ]
+        assert not models.Movie.genres.through.objects.filter(
+            movie_id=9
+        ).exists()
+
+    def test_load_saves_checkpoint_with_chunk(self, raw_movies):
+        checkpoint = models.IngestionCheckpoint(source_hash='a' * 64)
+        checkpoint.last_row = 3
+        MovieBulkLoader().load(_normalized(raw_movies), checkpoint)
+        assert models.IngestionCheckpoint.objects.get().last_row == 3
+
+    def test_load_rolls_back_checkpoint_with_chunk(self, raw_movies):
+        checkpoint = models.IngestionCheckpoint.objects.create(
+            source_hash='a' * 64, last_row=0
+        )
+        checkpoint.last_row = 3
+        movies = _normalized(raw_movies)
+        movies[-1]['id'] = movies[0]['id']
+        with pytest.raises(IntegrityError):
+            MovieBulkLoader().load(movies, checkpoint)
+        assert models.IngestionCheckpoint.objects.get().last_row == 0
+        assert not models.Movie.objects.exists()
@@ -1,6 +1,6 @@
 import pytest
 
-from movies import models
+from movies import managers, models
 
 
 @pytest.mark.django_db
@@ -39,3 +39,164 @@ class TestUniqueNameManager:
             models.Contributor.objects.get_by_natural_key('Mathieu Nebra').id
             == result[0].id
         )
+
+    def test_get_or_create_ids_creates_missing_names(self):
+        models.Genre.objects.create(name='Drama')
+        ids = models.Genre.objects.get_or_create_ids(['Drama', 'Comedy'])
+        assert models.Genre.objects.count() == 2
+        assert ids == dict(models.Genre.objects.values_list('name', 'id'))
+
+    def test_get_or_create_ids_uses_one_query_for_known_names(
+        self, django_assert_num_queries
+    ):
+        models.Genre.objects.create(name='Drama')
+        with django_assert_num_queries(1):
+            models.Genre.objects.get_or_create_ids(['Drama'])
+
+    def test_get_or_create_ids_answers_cached_names_without_query(
+        self, django_assert_num_queries
+    ):
+        cache = managers.NameCache()
+        models.Country.objects.get_or_create_ids(['USA', 'France'], cache)
+        with django_assert_num_queries(0):
+            ids = models.Country.objects.get_or_create_ids(['USA'], cache)
+        assert ids == {'USA': models.Country.objects.get(name='USA').id}
+        assert (cache.hits, cache.misses) == (1, 2)
+        assert len(cache) == 2
+
+    def test_get_or_create_ids_sets_name_keys_of_created_names(self):
+        models.Contributor.objects.get_or_create_ids(['Amélie Nothomb'])
+        assert models.Contributor.objects.get().name_key == 'amelie nothomb'
+
+    def test_save_updates_name_key(self):
+        genre = models.Genre.objects.create(name='Peplum')
+        genre.name = 'Péplum Épique'
+        genre.save()
+        genre.refresh_from_db()
+        assert genre.name_key == 'peplum epique'
+
+
+@pytest.mark.django_db
+class TestMovieCardManager:
+    """Integration tests on the MovieCardManager methods."""
+
+    def test_rebuild_creates_one_card_per_movie(self, movie_factory):
+        movies = movie_factory.create_batch(5)
+        assert models.MovieCard.objects.rebuild(batch_size=2) == 5
+        cards = models.MovieCard.objects.in_bulk()
+        for movie in movies:
+            payload = cards[movie.id].payload
+            assert payload['id'] == movie.id
+            assert payload['title'] == movie.title
+            assert 'url' not in payload
+
+    def test_rebuild_replaces_stale_cards(self, movie_factory):
+        movie = movie_factory()
+        models.MovieCard.objects.rebuild()
+        models.Movie.objects.filter(pk=movie.pk).update(title='Vertigo')
+        models.MovieCard.objects.rebuild()
+        assert models.MovieCard.objects.get().payload['title'] == 'Vertigo'
+
+    def test_rebuild_replaces_cards_of_given_movies(self, movie_factory):
+        movies = movie_factory.create_batch(3)
+        models.MovieCard.objects.rebuild()
+        models.Movie.objects.update(title='Vertigo')
+        n_cards = models.MovieCard.objects.rebuild(
+            batch_size=1, movie_ids=[movies[0].id, movies[2].id, 0]
+        )
+        assert n_cards == 2
+        titles = dict(
+            (card.movie_id, card.payload['title'])
+            for card in models.MovieCard.objects.all()
+        )
+        assert titles == {
+            movies[0].id: 'Vertigo',
+            movies[1].id: movies[1].title,
+            movies[2].id: 'Vertigo',
+        }
+
+    def test_cards_are_deleted_with_movies(self, movie_factory):
+        movie_factory()
+        models.MovieCard.objects.rebuild()
+        models.Movie.objects.all().delete()
+        assert not models.MovieCard.objects.exists()
+
+
+@pytest.mark.django_db
+class TestLeaderboardEntryManager:
+    """Integration tests on the LeaderboardEntryManager methods."""
+
+    @pytest.fixture
+    def movies(self, movie_factory):
+        movies = movie_factory.create_batch(10)
+        for index, movie in enumerate(movies):
+            movie.votes = 500 * (index + 1)
+            movie.year = 1990 + index * 3
+            movie.imdb_score = [8, 7, 8, 9, 6][index % 5]
+            movie.save()
+        return movies
+
+    @staticmethod
+    def _board(board, key=''):
+        return list(
+            models.LeaderboardEntry.objects.filter(board=board, key=key)
+            .order_by('rank')
+            .values_list('movie_id', flat=True)
+        )
+
+    @staticmethod
+    def _best(movies):
+        movies = sorted(
+            movies, key=lambda m: (m.imdb_score, m.id), reverse=True
+        )
+        return [movie.id for movie in movies]
+
+    def test_rebuild_ranks_movies_overall(self, movies):
+        models.LeaderboardEntry.objects.rebuild(size=4, min_votes=0)
+        assert self._board('all') == self._best(movies)[:4]
+
+    def test_rebuild_ranks_movies_per_genre(self, movies):
+        models.LeaderboardEntry.objects.rebuild(size=3, min_votes=0)
+        for genre in models.Genre.objects.filter(movies__isnull=False):
+            expected = self._best(genre.movies.all())[:3]
+            assert self._board('genre', genre.name_key) == expected
+
+    def test_rebuild_ranks_movies_per_decade(self, movies):
+        models.LeaderboardEntry.objects.rebuild(size=3, min_votes=0)
+        for decade in [1990, 2000, 2010]:
+            expected = self._best(
+                movie for movie in movies
+                if decade <= movie.year < decade + 10
+            )[:3]
+            assert self._board('decade', str(decade)) == expected
+
+    def test_rebuild_skips_movies_with_few_votes(self, movies):
+        models.LeaderboardEntry.objects.rebuild(size=10, min_votes=2500)
+        expected = self._best(movie for movie in movies if movie.votes >= 2500)
+        assert self._board('all') == expected
+
+    def test_rebuild_copies_cards(self, movies):
+        models.MovieCard.objects.rebuild()
+        models.Movie.objects.filter(pk=movies[0].pk).update(title='Vertigo')
+        models.LeaderboardEntry.objects.rebuild(min_votes=0)
+        entry = models.LeaderboardEntry.objects.filter(
+            board='all', movie=movies[0]
+        ).get()
+        assert entry.payload == models.MovieCard.objects.get(
+            pk=movies[0].pk
+        ).payload
+
+    def test_rebuild_renders_movies_without_card(self, movies):
+        models.LeaderboardEntry.objects.rebuild(min_votes=0)
+        entry = models.LeaderboardEntry.objects.filter(
+            board='all', movie=movies[0]
+        ).get()
+        assert entry.payload['title'] == movies[0].title
+        assert 'url' not in entry.payload
+
+    def test_rebuild_replaces_entries(self, movies):
+        models.LeaderboardEntry.objects.rebuild(size=2, min_votes=0)
+        assert models.LeaderboardEntry.objects.rebuild(
+            size=1, min_votes=100000
+        ) == 0
+        assert not models.LeaderboardEntry.objects.exists()
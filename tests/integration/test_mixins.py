@@ -0,0 +1,158 @@
+import pytest
+from django.urls import reverse
+
+from api.v1.mixins import DATASET_KEY, get_dataset
+from movies import models
+
+
+@pytest.mark.django_db
+class TestCachedResponseMixin:
+    """Integration tests on the caching of the API responses."""
+
+    def test_repeated_request_is_served_without_query(
+        self, api_client, movie_factory, django_assert_num_queries
+    ):
+        movie_factory.create_batch(3)
+        expected = api_client.get(reverse('movie-list')).json()
+        with django_assert_num_queries(0):
+            response = api_client.get(reverse('movie-list'))
+        assert response.json() == expected
+
+    def test_equivalent_queries_share_cache_entry(
+        self, api_client, movie_factory, django_assert_num_queries
+    ):
+        movie_factory.create_batch(3)
+        api_client.get(
+            reverse('movie-list'),
+            {'genre': 'Drama', 'sort_by': '-Votes', 'page_size': 80},
+        )
+        with django_assert_num_queries(0):
+            api_client.get(
+                reverse('movie-list'),
+                {'page_size': 50, 'sort_by': '-votes', 'genre': 'drama'},
+            )
+
+    def test_detail_and_genres_are_cached(
+        self, api_client, movie_factory, django_assert_num_queries
+    ):
+        movie = movie_factory()
+        urls = [reverse('movie-detail', args=[movie.pk]), '/api/v1/genres/']
+        for url in urls:
+            api_client.get(url)
+        with django_assert_num_queries(0):
+            for url in urls:
+                assert api_client.get(url).status_code == 200
+
+    def test_secure_requests_have_own_cache_entry(
+        self, api_client, movie_factory
+    ):
+        movie = movie_factory()
+        api_client.get(reverse('movie-list'))
+        response = api_client.get(reverse('movie-list'), secure=True)
+        assert response.data['results'][0]['url'] == (
+            f'https://testserver/api/v1/titles/{movie.pk}'
+        )
+
+    def test_not_found_responses_are_not_cached(
+        self, api_client, django_assert_num_queries
+    ):
+        get_dataset()
+        api_client.get(reverse('movie-detail', args=[1]))
+        with django_assert_num_queries(1):
+            response = api_client.get(reverse('movie-detail', args=[1]))
+        assert response.status_code == 404
+
+    def test_new_dataset_version_invalidates_responses(
+        self, api_client, movie_factory, api_cache
+    ):
+        movie = movie_factory()
+        api_client.get(reverse('movie-detail', args=[movie.pk]))
+        models.Movie.objects.filter(pk=movie.pk).update(title='Vertigo')
+        models.Dataset.objects.bump()
+        # the version is read again once its cached value expires
+        api_cache.delete(DATASET_KEY)
+        response = api_client.get(reverse('movie-detail', args=[movie.pk]))
+        assert response.data['title'] == 'Vertigo'
+
+
+@pytest.mark.django_db
+class TestDatasetManager:
+    """Integration tests on the DatasetManager methods."""
+
+    def test_current_creates_initial_version(self):
+        assert models.Dataset.objects.current().version == 0
+        assert models.Dataset.objects.count() == 1
+
+    def test_bump_changes_version_and_tag(self):
+        tag = models.Dataset.objects.current().tag
+        dataset = models.Dataset.objects.bump()
+        assert dataset.version == 1
+        assert dataset.tag != tag
+
+
+@pytest.mark.django_db
+class TestConditionalGetMixin:
+    """Integration tests on the conditional requests to the API."""
+
+    def test_response_has_validators(self, api_client, movie_factory):
+        movie = movie_factory()
+        response = api_client.get(reverse('movie-detail', args=[movie.pk]))
+        assert response.headers['ETag'].startswith('"')
+        assert response.headers['Last-Modified'].endswith('GMT')
+        assert 'Accept' in response.headers['Vary']
+
+    def test_matching_etag_is_answered_without_query(
+        self, api_client, movie_factory, django_assert_num_queries
+    ):
+        movie_factory.create_batch(3)
+        etag = api_client.get(reverse('movie-list')).headers['ETag']
+        with django_assert_num_queries(0):
+            response = api_client.get(
+                reverse('movie-list'), HTTP_IF_NONE_MATCH=etag
+            )
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert not response.content
+
+    def test_unmodified_since_is_answered_without_query(
+        self, api_client, django_assert_num_queries
+    ):
+        response = api_client.get('/api/v1/genres/')
+        last_modified = response.headers['Last-Modified']
+        with django_assert_num_queries(0):
+            response = api_client.get(
+                '/api/v1/genres/', HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+        assert response.status_code == 304
+
+    def test_etag_depends_on_url_scheme_and_media_type(
+        self, api_client, movie_factory
+    ):
+        movie_factory.create_batch(6)
+        etags = {
+            api_client.get(reverse('movie-list')).headers['ETag'],
+            api_client.get(reverse('movie-list'), {'page': 2}).headers['ETag'],
+            api_client.get(
+                reverse('movie-list'), HTTP_ACCEPT='text/html'
+            ).headers['ETag'],
+            api_client.get(reverse('movie-list'), secure=True).headers['ETag'],
+        }
+        assert len(etags) == 4
+
+    def test_new_dataset_version_changes_etag(
+        self, api_client, movie_factory, api_cache
+    ):
+        movie_factory()
+        etag = api_client.get(reverse('movie-list')).headers['ETag']
+        models.Dataset.objects.bump()
+        api_cache.delete(DATASET_KEY)
+        response = api_client.get(
+            reverse('movie-list'), HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_error_responses_have_no_validators(self, api_client):
+        response = api_client.get(reverse('movie-detail', args=[1]))
+        assert response.status_code == 404
+        assert 'ETag' not in response.headers
@@ -0,0 +1,110 @@
+import pytest
+
+from movies import models
+
+
+def _credits(movie, relation, attribute):
+    return [
+        (getattr(row, attribute).name, row.position)
+        for row in getattr(movie, relation).order_by('position')
+    ]
+
+
+@pytest.mark.django_db
+class TestMovieRelations:
+    """Integration tests on the methods adding relations to movies."""
+
+    def test_add_actors_numbers_actors_in_order(self, movie_factory):
+        movie = movie_factory()
+        models.MovieActor.objects.filter(movie=movie).delete()
+        first, second = (
+            models.Contributor.objects.create(name=name)
+            for name in ('Zozor', 'Mathieu Nebra')
+        )
+        movie.add_actors(first, second)
+        assert _credits(movie, 'movieactors', 'actor') == [
+            ('Zozor', 1),
+            ('Mathieu Nebra', 2),
+        ]
+
+    def test_add_directors_numbers_after_existing_directors(
+        self, movie_factory
+    ):
+        movie = movie_factory()
+        n_directors = movie.directors.count()
+        director = models.Contributor.objects.create(name='Agnès Varda')
+        movie.add_directors(director)
+        assert movie.moviedirectors.get(director=director).position == (
+            n_directors + 1
+        )
+
+    def test_add_writers_skips_already_linked_writers(self, movie_factory):
+        movie = movie_factory()
+        models.MovieWriter.objects.filter(movie=movie).delete()
+        first, second, third = (
+            models.Contributor.objects.create(name=name)
+            for name in ('A', 'B', 'C')
+        )
+        movie.add_writers(first, first, second)
+        movie.add_writers(second, third)
+        assert _credits(movie, 'moviewriters', 'writer') == [
+            ('A', 1),
+            ('B', 3),
+            ('C', 4),
+        ]
+
+    def test_add_actors_uses_two_queries(
+        self, movie_factory, django_assert_num_queries
+    ):
+        movie = movie_factory()
+        actors = [
+            models.Contributor.objects.create(name=f'Actor {i}')
+            for i in range(10)
+        ]
+        with django_assert_num_queries(2):
+            movie.add_actors(*actors)
+
+    def test_add_genres_skips_already_linked_genres(
+        self, movie_factory, django_assert_num_queries
+    ):
+        movie = movie_factory()
+        genres = list(movie.genres.all())
+        genre = models.Genre.objects.create(name='Peplum')
+        with django_assert_num_queries(2):
+            movie.add_genres(genre, *genres)
+        assert set(movie.genres.all()) == {genre, *genres}
+
+
+@pytest.mark.django_db
+class TestMovieManagerRelations:
+    """Integration tests on the MovieManager methods adding relations to
+    many movies at once."""
+
+    def test_add_positioned_handles_many_movies(
+        self, movie_factory, django_assert_num_queries
+    ):
+        movies = [movie_factory(id=i) for i in range(1, 4)]
+        models.MovieActor.objects.all().delete()
+        actors = [
+            models.Contributor.objects.create(name=f'Actor {i}')
+            for i in range(3)
+        ]
+        with django_assert_num_queries(2):
+            models.Movie.objects.add_positioned(
+                'actors',
+                [(movie, actors[i:]) for i, movie in enumerate(movies)],
+            )
+        assert _credits(movies[2], 'movieactors', 'actor') == [('Actor 2', 1)]
+        assert _credits(movies[0], 'movieactors', 'actor') == [
+            ('Actor 0', 1),
+            ('Actor 1', 2),
+            ('Actor 2', 3),
+        ]
+
+    def test_add_related_accepts_ids(self, movie_factory):
+        movie = movie_factory()
+        country = models.Country.objects.create(name='Groland')
+        models.Movie.objects.add_related(
+            'countries', [(movie.id, [country.id])]
+        )
+        assert country in movie.countries.all()
@@ -0,0 +1,230 @@
+import base64
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.v1.mixins import DATASET_KEY, get_dataset
+from movies import models
+
+ORDERINGS = [
+    '',
+    'title',
+    '-imdb_score',
+    'metascore',
+    '-metascore',
+    '-year,title',
+    'year,-metascore',
+    '-date_published',
+    '-id',
+]
+
+
+@pytest.fixture
+def movies(movie_factory):
+    """Returns movies with duplicate years and scores and some null
+    metascores."""
+    movies = movie_factory.create_batch(13)
+    for index, movie in enumerate(movies):
+        movie.year = 2000 + index % 3
+        movie.imdb_score = Decimal('7.5') if index % 2 else Decimal('6.1')
+        movie.metascore = None if index % 4 == 0 else Decimal(index % 5)
+        movie.save()
+    return movies
+
+
+def _offset_ids(api_client, sort_by):
+    params = {'page_size': 50}
+    if sort_by:
+        # sort_by breaks the ties with the id, as the cursor pagination does
+        params['sort_by'] = sort_by
+    response = api_client.get(reverse('movie-list'), params)
+    return [result['id'] for result in response.data['results']]
+
+
+def _cursor_pages(api_client, sort_by, page_size=4):
+    params = {'pagination': 'cursor', 'page_size': page_size}
+    if sort_by:
+        params['sort_by'] = sort_by
+    pages = []
+    response = api_client.get(reverse('movie-list'), params)
+    while True:
+        pages.append(response.data)
+        if response.data['next'] is None:
+            return pages
+        response = api_client.get(response.data['next'])
+
+
+@pytest.mark.django_db
+class TestTitleCursorPagination:
+    """Integration tests on the keyset pagination of the titles list."""
+
+    @pytest.mark.parametrize('sort_by', ORDERINGS)
+    def test_pages_match_offset_pagination(self, api_client, movies, sort_by):
+        pages = _cursor_pages(api_client, sort_by)
+        ids = [result['id'] for page in pages for result in page['results']]
+        assert ids == _offset_ids(api_client, sort_by)
+        assert [len(page['results']) for page in pages] == [4, 4, 4, 1]
+
+    @pytest.mark.parametrize('sort_by', ORDERINGS)
+    def test_previous_links_walk_back_pages(self, api_client, movies, sort_by):
+        pages = _cursor_pages(api_client, sort_by)
+        previous = pages[-1]['previous']
+        for page in reversed(pages[:-1]):
+            response = api_client.get(previous)
+            assert response.data['results'] == page['results']
+            previous = response.data['previous']
+        assert previous is None
+
+    def test_first_page_has_no_previous_link(self, api_client, movies):
+        response = api_client.get(
+            reverse('movie-list'), {'pagination': 'cursor'}
+        )
+        assert response.data['previous'] is None
+        assert 'count' not in response.data
+
+    def test_deep_page_runs_two_queries(
+        self, api_client, movies, api_cache, django_assert_num_queries
+    ):
+        models.MovieCard.objects.rebuild()
+        pages = _cursor_pages(api_client, '-imdb_score', page_size=2)
+        api_cache.clear()
+        get_dataset()
+        # page ids and cards, without count
+        with django_assert_num_queries(2):
+            api_client.get(pages[-2]['next'])
+
+    @pytest.mark.parametrize('sort_by', ['-imdb_score', 'metascore'])
+    def test_deep_page_scans_covering_index(
+        self, api_client, movies, api_cache, sort_by
+    ):
+        pages = _cursor_pages(api_client, sort_by)
+        api_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            api_client.get(pages[1]['next'])
+        sql = next(
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT "movies_movie"."id"')
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        field = sort_by.lstrip('-')
+        assert f'COVERING INDEX movie_{field}_id_idx' in plan, plan
+        assert 'TEMP B-TREE' not in plan, plan
+
+    def test_relation_ordering_is_rejected(self, api_client, movies):
+        response = api_client.get(
+            reverse('movie-list'),
+            {'pagination': 'cursor', 'sort_by': 'genres__name'},
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('pagination', ['CURSOR', 'cursor'])
+    def test_pagination_parameter_is_case_insensitive(
+        self, api_client, movies, pagination
+    ):
+        for value in ['Cursor', pagination]:
+            response = api_client.get(
+                reverse('movie-list'), {'pagination': value}
+            )
+            assert response.status_code == 200
+            assert 'count' not in response.data
+
+    @pytest.mark.parametrize('cursor', ['garbage', 'eyJ2IjogWzFdfQ=='])
+    def test_invalid_cursor_is_not_found(self, api_client, movies, cursor):
+        response = api_client.get(
+            reverse('movie-list'), {'pagination': 'cursor', 'cursor': cursor}
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('sort_by, values', [
+        ('year', '["abc", 1]'),
+        ('year', '[[2000], 1]'),
+        ('-date_published', '["not a date", 1]'),
+    ])
+    def test_cursor_of_wrong_type_is_not_found(
+        self, api_client, movies, sort_by, values
+    ):
+        cursor = base64.urlsafe_b64encode(
+            f'{{"v": {values}, "r": 0}}'.encode()
+        ).decode()
+        response = api_client.get(
+            reverse('movie-list'),
+            {'pagination': 'cursor', 'sort_by': sort_by, 'cursor': cursor},
+        )
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestTitleSetPagination:
+    """Integration tests on the counts of the page number pagination."""
+
+    def test_count_is_cached_across_pages(
+        self, api_client, movies, django_assert_num_queries
+    ):
+        models.MovieCard.objects.rebuild()
+        params = {'year': 2001, 'page_size': 2}
+        first = api_client.get(reverse('movie-list'), params)
+        # page ids and cards, the count being read from the cache
+        with django_assert_num_queries(2):
+            response = api_client.get(
+                reverse('movie-list'), {**params, 'page': 2}
+            )
+        assert response.data['count'] == first.data['count'] == 4
+
+    def test_count_depends_on_filters(self, api_client, movies):
+        counts = [
+            api_client.get(reverse('movie-list'), params).data['count']
+            for params in ({}, {'year': 2000}, {'min_year': 2001})
+        ]
+        assert counts == [13, 5, 8]
+
+    def test_count_is_recomputed_for_new_dataset(
+        self, api_client, movies, api_cache
+    ):
+        api_client.get(reverse('movie-list'))
+        models.Movie.objects.filter(year=2000).delete()
+        models.Dataset.objects.bump()
+        api_cache.delete(DATASET_KEY)
+        assert api_client.get(reverse('movie-list')).data['count'] == 8
+
+    def test_uncounted_pages_match_counted_pages(self, api_client, movies):
+        params = {'sort_by': '-imdb_score,id', 'page_size': 4}
+        for page in (1, 2, 3, 4):
+            counted = api_client.get(
+                reverse('movie-list'), {**params, 'page': page}
+            ).data
+            uncounted = api_client.get(
+                reverse('movie-list'),
+                {**params, 'page': page, 'count': 'false'},
+            ).data
+            assert uncounted['count'] is None
+            assert uncounted['results'] == counted['results']
+            assert (uncounted['next'] is None) == (counted['next'] is None)
+            assert (uncounted['previous'] is None) == (
+                counted['previous'] is None
+            )
+
+    def test_uncounted_page_runs_no_count(
+        self, api_client, movies, django_assert_num_queries
+    ):
+        models.MovieCard.objects.rebuild()
+        get_dataset()
+        # page ids with one extra row, and cards
+        with django_assert_num_queries(2):
+            response = api_client.get(
+                reverse('movie-list'), {'count': 'false', 'page': 2}
+            )
+        assert response.data['next'] is not None
+
+    @pytest.mark.parametrize('page', ['last', '5', '0'])
+    def test_uncounted_invalid_page_is_not_found(
+        self, api_client, movies, page
+    ):
+        response = api_client.get(
+            reverse('movie-list'), {'count': 'false', 'page': page}
+        )
+        assert response.status_code == 404
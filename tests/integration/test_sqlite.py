@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+
+from movies import sqlite
+
+
+def _fts_match(expression):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT rowid FROM movies_movie_fts WHERE movies_movie_fts '
+            'MATCH %s',
+            [expression],
+        )
+        return [rowid for rowid, in cursor.fetchall()]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBulkLoadProfile:
+    """Integration tests on the bulk_load_profile context manager, run
+    outside of a transaction since pragmas cannot change inside one."""
+
+    def test_bulk_load_profile_drops_and_rebuilds_indexes(self):
+        indexes = sqlite.get_secondary_indexes()
+        assert indexes
+        with sqlite.bulk_load_profile() as profile:
+            assert sqlite.get_secondary_indexes() == []
+            assert profile['indexes'] == indexes
+        assert sqlite.get_secondary_indexes() == indexes
+
+    def test_bulk_load_profile_can_keep_indexes(self):
+        indexes = sqlite.get_secondary_indexes()
+        with sqlite.bulk_load_profile(drop_indexes=False) as profile:
+            assert sqlite.get_secondary_indexes() == indexes
+            assert profile['indexes'] == []
+
+    def test_bulk_load_profile_restores_serving_pragmas(self):
+        with sqlite.bulk_load_profile() as profile:
+            assert profile['pragmas']['synchronous'] == 1
+            assert profile['pragmas']['temp_store'] == 2
+        assert profile['serving_pragmas']['synchronous'] == 2
+        assert profile['serving_pragmas']['temp_store'] == 0
+
+    def test_bulk_load_profile_rebuilds_indexes_after_error(self):
+        indexes = sqlite.get_secondary_indexes()
+        with pytest.raises(RuntimeError):
+            with sqlite.bulk_load_profile():
+                raise RuntimeError
+        assert sqlite.get_secondary_indexes() == indexes
+
+    def test_bulk_load_profile_drops_triggers_and_rebuilds_fts(
+        self, movie_factory
+    ):
+        triggers = sqlite.get_triggers()
+        assert triggers
+        with sqlite.bulk_load_profile() as profile:
+            assert sqlite.get_triggers() == []
+            movie = movie_factory(title='Zorglub')
+            assert _fts_match('zorglub') == []
+        assert profile['triggers'] == triggers
+        assert profile['fts_tables'] == [
+            'movies_contributor_fts',
+            'movies_movie_fts',
+        ]
+        assert sqlite.get_triggers() == triggers
+        assert _fts_match('zorglub') == [movie.id]
+
+    def test_bulk_load_profile_rebuilds_leftover_triggers(self):
+        triggers = sqlite.get_triggers()
+        with connection.cursor() as cursor:
+            for name, _ in triggers:
+                cursor.execute(f'DROP TRIGGER "{name}"')
+        with sqlite.bulk_load_profile(
+            drop_indexes=False, dropped=triggers
+        ) as profile:
+            assert profile['triggers'] == triggers
+        assert sqlite.get_triggers() == triggers
@@ -0,0 +1,299 @@
+from collections import Counter
+
+import pytest
+from django.urls import reverse
+
+from api.v1.mixins import get_dataset
+from movies import models
+
+
+@pytest.mark.django_db
+class TestMovieTitleListView:
+    """Integration tests on the titles list endpoint."""
+
+    @pytest.mark.parametrize('page_size', [1, 5, 50])
+    def test_list_uses_constant_number_of_queries(
+        self, api_client, movie_factory, django_assert_num_queries, page_size
+    ):
+        """Verifies that the number of queries does not depend on the number
+        of movies in the page."""
+        movie_factory.create_batch(12)
+        get_dataset()
+        # count, ids, cards, movies without a card, then one query per
+        # prefetched many to many field
+        with django_assert_num_queries(8):
+            response = api_client.get(
+                reverse('movie-list'), {'page_size': page_size}
+            )
+        assert response.status_code == 200
+        assert len(response.data['results']) == min(page_size, 12)
+
+    @pytest.mark.parametrize('page_size', [1, 5, 50])
+    def test_list_serves_cards_in_three_queries(
+        self, api_client, movie_factory, django_assert_num_queries, page_size
+    ):
+        movie_factory.create_batch(12)
+        models.MovieCard.objects.rebuild()
+        get_dataset()
+        # count, ids and cards
+        with django_assert_num_queries(3):
+            response = api_client.get(
+                reverse('movie-list'), {'page_size': page_size}
+            )
+        assert len(response.data['results']) == min(page_size, 12)
+
+    def test_list_cards_match_serializer(
+        self, api_client, movie_factory, api_cache
+    ):
+        movie_factory.create_batch(6)
+        params = {'page_size': 4, 'sort_by': '-imdb_score'}
+        expected = api_client.get(reverse('movie-list'), params).json()
+        models.MovieCard.objects.rebuild(batch_size=4)
+        api_cache.clear()
+        assert api_client.get(reverse('movie-list'), params).json() == expected
+
+    def test_list_mixes_cards_and_movies_without_card(
+        self, api_client, movie_factory, api_cache
+    ):
+        movie_factory.create_batch(3)
+        expected = api_client.get(reverse('movie-list')).json()
+        models.MovieCard.objects.rebuild()
+        models.MovieCard.objects.order_by('movie').first().delete()
+        api_cache.clear()
+        assert api_client.get(reverse('movie-list')).json() == expected
+
+    def test_list_applies_filters_to_movies(self, api_client, movie_factory):
+        movies = movie_factory.create_batch(3)
+        models.MovieCard.objects.rebuild()
+        response = api_client.get(
+            reverse('movie-list'), {'title': movies[1].title}
+        )
+        assert [result['id'] for result in response.data['results']] == [
+            movie.id for movie in movies if movie.title == movies[1].title
+        ]
+
+    def test_list_orders_contributors_by_position(
+        self, api_client, movie_factory
+    ):
+        movie = movie_factory()
+        for through in (
+            models.MovieDirector, models.MovieActor, models.MovieWriter
+        ):
+            through.objects.filter(movie=movie).delete()
+        for name in ('Zozor', 'Agnès Varda', 'Mathieu Nebra'):
+            contributor = models.Contributor.objects.create(name=name)
+            movie.add_directors(contributor)
+            movie.add_actors(contributor)
+            movie.add_writers(contributor)
+        response = api_client.get(reverse('movie-list'))
+        result = response.data['results'][0]
+        expected = ['Zozor', 'Agnès Varda', 'Mathieu Nebra']
+        assert result['directors'] == expected
+        assert result['actors'] == expected
+        assert result['writers'] == expected
+
+
+@pytest.mark.django_db
+class TestMovieTitleDetailView:
+    """Integration tests on the title detail endpoint."""
+
+    def test_detail_uses_constant_number_of_queries(
+        self,
+        api_client,
+        movie_factory,
+        rating_factory,
+        company_factory,
+        django_assert_num_queries,
+    ):
+        movie = movie_factory(
+            rated=rating_factory(), company=company_factory()
+        )
+        get_dataset()
+        # movie joined with its rating and company, then one query per
+        # prefetched many to many field
+        with django_assert_num_queries(7):
+            response = api_client.get(reverse('movie-detail', args=[movie.pk]))
+        assert response.status_code == 200
+        assert response.data['rated'] == movie.rated.name
+        assert response.data['company'] == movie.company.name
+        assert len(response.data['countries']) == movie.countries.count()
+
+    def test_detail_orders_contributors_by_position(
+        self, api_client, movie_factory
+    ):
+        movie = movie_factory()
+        expected = [
+            str(row.actor) for row in movie.movieactors.order_by('position')
+        ]
+        response = api_client.get(reverse('movie-detail', args=[movie.pk]))
+        assert response.data['actors'] == expected
+
+    def test_detail_returns_404_for_unknown_movie(self, api_client):
+        response = api_client.get(reverse('movie-detail', args=[1]))
+        assert response.status_code == 404
+
+
+def _expected_facet(values):
+    counts = Counter(values)
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+@pytest.mark.django_db
+class TestMovieTitleFacetsView:
+    """Integration tests on the titles facets endpoint."""
+
+    @pytest.fixture
+    def movies(self, movie_factory, rating_factory):
+        movies = movie_factory.create_batch(12)
+        ratings = rating_factory.create_batch(2)
+        for index, movie in enumerate(movies):
+            movie.rated = ratings[index % 3] if index % 3 < 2 else None
+            movie.year = 1985 + index * 3
+            movie.save()
+        return movies
+
+    @staticmethod
+    def _as_pairs(rows, key='name'):
+        return [(row[key], row['count']) for row in rows]
+
+    @pytest.mark.parametrize(
+        'params',
+        [{}, {'min_year': 1995}, {'min_year': 1990, 'max_year': 1999}],
+    )
+    def test_facets_count_filtered_movies(self, api_client, movies, params):
+        selected = [
+            movie for movie in movies
+            if movie.year >= params.get('min_year', 0)
+            and movie.year <= params.get('max_year', 9999)
+        ]
+        response = api_client.get(reverse('movie-facets'), params)
+        assert response.status_code == 200
+        data = response.data
+        assert data['count'] == len(selected)
+        for name in ['genres', 'countries', 'languages']:
+            assert self._as_pairs(data[name]) == _expected_facet(
+                related.name
+                for movie in selected
+                for related in getattr(movie, name).all()
+            )
+        assert self._as_pairs(data['ratings']) == _expected_facet(
+            movie.rated.name for movie in selected if movie.rated
+        )
+        assert self._as_pairs(data['decades'], 'decade') == _expected_facet(
+            movie.year // 10 * 10 for movie in selected
+        )
+
+    def test_facets_accept_every_title_filter(self, api_client, movies):
+        genre = movies[0].genres.first()
+        params = {'genre': genre.name, 'q': 'a', 'sort_by': '-votes'}
+        facets = api_client.get(reverse('movie-facets'), params)
+        titles = api_client.get(reverse('movie-list'), params)
+        assert facets.status_code == 200
+        assert facets.data['count'] == titles.data['count']
+        assert {
+            'name': genre.name, 'count': titles.data['count']
+        } in facets.data['genres']
+
+    def test_facets_use_one_query_per_facet(
+        self, api_client, movies, django_assert_num_queries
+    ):
+        get_dataset()
+        # count, then genres, countries, languages, ratings and decades
+        with django_assert_num_queries(6):
+            response = api_client.get(
+                reverse('movie-facets'), {'min_year': 1990}
+            )
+        assert response.status_code == 200
+
+    def test_facets_answer_conditional_requests(self, api_client, movies):
+        response = api_client.get(reverse('movie-facets'))
+        response = api_client.get(
+            reverse('movie-facets'), HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        assert response.status_code == 304
+
+    def test_facets_reject_invalid_filters(self, api_client, movies):
+        response = api_client.get(
+            reverse('movie-facets'), {'sort_by': 'budget'}
+        )
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestMovieTitleTopView:
+    """Integration tests on the titles top endpoint."""
+
+    @pytest.fixture
+    def movies(self, movie_factory, genre_factory):
+        movies = movie_factory.create_batch(12)
+        western = genre_factory(name='Western Spaghetti')
+        for index, movie in enumerate(movies):
+            movie.imdb_score = [7, 9, 8][index % 3]
+            movie.year = 1960 + index * 2
+            if index % 2:
+                movie.add_genres(western)
+            movie.save()
+        models.MovieCard.objects.rebuild()
+        models.LeaderboardEntry.objects.rebuild(size=20, min_votes=0)
+        return movies
+
+    def _top_ids(self, api_client, params):
+        response = api_client.get(reverse('movie-top'), params)
+        assert response.status_code == 200
+        ranks = [movie['rank'] for movie in response.data['results']]
+        assert ranks == list(range(1, len(ranks) + 1))
+        return [movie['id'] for movie in response.data['results']]
+
+    def _list_ids(self, api_client, params):
+        response = api_client.get(
+            reverse('movie-list'),
+            {**params, 'sort_by': '-imdb_score', 'page_size': 50},
+        )
+        return [movie['id'] for movie in response.data['results']]
+
+    @pytest.mark.parametrize(
+        'params, list_params',
+        [
+            ({}, {}),
+            ({'limit': 3}, {}),
+            ({'genre': 'WESTERN spaghetti'}, {'genre': 'western spaghetti'}),
+            ({'decade': 1965}, {'min_year': 1960, 'max_year': 1969}),
+        ],
+    )
+    def test_top_matches_sorted_list(
+        self, api_client, movies, params, list_params
+    ):
+        expected = self._list_ids(api_client, list_params)
+        limit = params.get('limit', 10)
+        assert self._top_ids(api_client, params) == expected[:limit]
+
+    def test_top_serves_cards(self, api_client, movies):
+        response = api_client.get(reverse('movie-top'), {'limit': 1})
+        movie = response.data['results'][0]
+        card = models.MovieCard.objects.get(pk=movie['id']).payload
+        assert movie['url'].endswith(
+            reverse('movie-detail', args=[movie['id']])
+        )
+        assert movie['title'] == card['title']
+
+    def test_top_reads_leaderboard_in_one_query(
+        self, api_client, movies, django_assert_num_queries
+    ):
+        get_dataset()
+        with django_assert_num_queries(1):
+            response = api_client.get(
+                reverse('movie-top'), {'genre': 'space opera lunaire'}
+            )
+        assert response.data == {'results': []}
+
+    @pytest.mark.parametrize(
+        'params',
+        [
+            {'genre': 'drama', 'decade': 1990},
+            {'decade': 'nineties'},
+            {'limit': 0},
+        ],
+    )
+    def test_top_rejects_invalid_parameters(self, api_client, movies, params):
+        response = api_client.get(reverse('movie-top'), params)
+        assert response.status_code == 400
@@ -0,0 +1,36 @@
+from array import array
+
+import pytest
+
+from movies import bitmaps
+
+
+class TestBitmaps:
+    """Tests the bitmap helpers of the movies bitmap index."""
+
+    def test_positions_to_bitmap_sets_given_bits(self):
+        assert bitmaps.positions_to_bitmap([0, 3, 9], 10) == 0b1000001001
+
+    @pytest.mark.parametrize('start', [0, 1, 2, 63, 64, 70])
+    def test_iter_positions_skips_first_positions(self, start):
+        positions = [0, 5, 63, 64, 65, 130, 1000]
+        bitmap = bitmaps.positions_to_bitmap(positions, 1001)
+        assert list(bitmaps.iter_positions(bitmap, start)) == positions[start:]
+
+    def test_selection_counts_and_slices_ids(self):
+        ids = array('q', range(100, 200))
+        bitmap = bitmaps.positions_to_bitmap(range(0, 100, 3), 100)
+        selection = bitmaps.BitmapSelection(bitmap, ids)
+        expected = list(range(100, 200, 3))
+        assert selection.count() == len(selection) == len(expected)
+        assert list(selection) == expected
+        assert selection[5:10] == expected[5:10]
+        assert selection[30:50] == expected[30:50]
+        assert selection[2] == expected[2]
+        assert selection[-1] == expected[-1]
+
+    def test_compress_keeps_small_sets_as_arrays(self):
+        assert bitmaps.MovieBitmapIndex.compress({7, 3}, 1000) == array(
+            'I', [3, 7]
+        )
+        assert bitmaps.MovieBitmapIndex.compress({0, 1}, 20) == 0b11
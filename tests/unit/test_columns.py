@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from movies import columns
+
+
+@pytest.fixture
+def snapshot():
+    ids = np.array([3, 5, 8, 13, 21, 34], dtype=np.int64)
+    values = {
+        'year': np.array([2001, 1999, 2001, 2005, 1999, 2001], dtype=float),
+        'metascore': np.array([50, np.nan, 70, 50, np.nan, 90], dtype=float),
+    }
+    return columns.MovieColumns(ids, values)
+
+
+class TestMovieColumns:
+    """Tests the selection of movies from a columnar snapshot."""
+
+    @pytest.mark.parametrize(
+        'keys, expected',
+        [
+            ([('id', False)], [3, 5, 8, 13, 21, 34]),
+            ([('id', True)], [34, 21, 13, 8, 5, 3]),
+            ([('year', False), ('id', False)], [5, 21, 3, 8, 34, 13]),
+            ([('year', True), ('id', True)], [13, 34, 8, 3, 21, 5]),
+            ([('metascore', False), ('id', False)], [5, 21, 3, 13, 8, 34]),
+            ([('metascore', True), ('id', True)], [34, 8, 13, 3, 21, 5]),
+            (
+                [('year', True), ('metascore', False), ('id', False)],
+                [13, 3, 8, 34, 5, 21],
+            ),
+        ],
+    )
+    def test_select_sorts_on_keys(self, snapshot, keys, expected):
+        selection = snapshot.select([], keys)
+        assert list(selection) == expected
+        for start in range(6):
+            for stop in range(start, 7):
+                assert selection[start:stop] == expected[start:stop]
+
+    def test_select_filters_and_ignores_nulls(self, snapshot):
+        selection = snapshot.select(
+            [('year', 'gte', 2001), ('metascore', 'lt', 80)],
+            [('id', False)],
+        )
+        assert selection.count() == 3
+        assert list(selection) == [3, 8, 13]
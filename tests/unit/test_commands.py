@@ -0,0 +1,95 @@
+import csv
+from io import StringIO
+from zipfile import ZipFile
+
+import pytest
+
+from movies.management.commands import create_db
+
+
+def _rows(n):
+    return [
+        {
+            'imdb_title_id': f'tt{i:07d}',
+            'year': str(1950 + i),
+            'date_published': str(1950 + i),
+            'duration': '90',
+            'long_description': '',
+            'avg_vote': '7.1',
+            'imdb_score': '7.2',
+            'metascore': '',
+            'votes': '100',
+            'budget': '$ 1000',
+            'usa_gross_income': '',
+            'worldwide_gross_income': '',
+            'reviews_from_users': '',
+            'reviews_from_critics': '',
+            'rated': '',
+            'image_url': '',
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+class TestChunked:
+    """Tests the chunked helper function."""
+
+    @pytest.mark.parametrize(
+        'n, size, lengths',
+        [(0, 2, []), (3, 1, [1, 1, 1]), (5, 2, [2, 2, 1]), (4, 10, [4])],
+    )
+    def test_chunked_splits_iterable(self, n, size, lengths):
+        chunks = list(create_db.chunked(range(n), size))
+        assert [len(chunk) for chunk in chunks] == lengths
+        assert [item for chunk in chunks for item in chunk] == list(range(n))
+
+
+@pytest.fixture
+def csv_archive(tmp_path):
+    """Writes five raw movies into a zipped csv file and returns its path."""
+    rows = _rows(5)
+    content = StringIO()
+    writer = csv.DictWriter(content, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    path = tmp_path / 'movies.csv.zip'
+    with ZipFile(path, 'w') as zf:
+        zf.writestr('movies.csv', content.getvalue())
+    return path
+
+
+class TestReadCsvChunks:
+    """Tests the read_csv_chunks function."""
+
+    def test_read_csv_chunks_streams_rows(self, csv_archive):
+        chunks = list(create_db.read_csv_chunks(csv_archive, 2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert [row for chunk in chunks for row in chunk] == _rows(5)
+
+    def test_read_csv_chunks_skips_committed_rows(self, csv_archive):
+        chunks = list(create_db.read_csv_chunks(csv_archive, 2, skip=3))
+        assert [row for chunk in chunks for row in chunk] == _rows(5)[3:]
+
+
+class TestFileHash:
+    """Tests the file_hash function."""
+
+    def test_file_hash_depends_on_content(self, tmp_path):
+        first, second = tmp_path / 'first', tmp_path / 'second'
+        first.write_bytes(b'movies')
+        second.write_bytes(b'movies!')
+        assert create_db.file_hash(first) == create_db.file_hash(first)
+        assert create_db.file_hash(first) != create_db.file_hash(second)
+        assert len(create_db.file_hash(first)) == 64
+
+
+class TestNormalizeChunks:
+    """Tests the normalize_chunks function."""
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_normalize_chunks_keeps_chunk_order(self, workers):
+        chunks = list(create_db.chunked(_rows(50), 7))
+        results = list(create_db.normalize_chunks(iter(chunks), workers))
+        ids = [movie['id'] for chunk in results for movie in chunk]
+        assert ids == list(range(1, 51))
+        assert all(isinstance(movie['year'], int) for movie in results[-1])
@@ -0,0 +1,39 @@
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.v1.genres.views import GenreListView
+from api.v1.titles.views import MovieTitleListView
+
+
+def _canonical(view_class, query):
+    request = Request(APIRequestFactory().get('/', query))
+    return view_class().get_canonical_query(request)
+
+
+@pytest.mark.parametrize(
+    'query, expected',
+    [
+        ({}, ''),
+        ({'sort_by': '-IMDB_score', 'genre': 'Drama'},
+         'genre=drama&sort_by=-imdb_score'),
+        ({'title': 'Avatar'}, 'title=Avatar'),
+        ({'page_size': 80}, 'page_size=50'),
+        ({'page_size': 5}, ''),
+        ({'page_size': 'ten'}, ''),
+        ({'page_size': 0}, ''),
+        ({'page_size': 12, 'page': 2}, 'page=2&page_size=12'),
+    ],
+)
+def test_canonical_query_of_titles(query, expected):
+    assert _canonical(MovieTitleListView, query) == expected
+
+
+def test_canonical_query_keeps_order_of_repeated_values():
+    assert _canonical(MovieTitleListView, {'genre': ['War', 'Drama']}) == (
+        'genre=war&genre=drama'
+    )
+
+
+def test_canonical_query_of_genres_keeps_name_case():
+    assert _canonical(GenreListView, {'name': 'Drama'}) == 'name=Drama'
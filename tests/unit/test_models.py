@@ -0,0 +1,20 @@
+import pytest
+
+from movies import models
+
+
+class TestFoldName:
+    """Tests the folding of the names into lookup keys."""
+
+    @pytest.mark.parametrize(
+        'name, key',
+        [
+            ('Amélie Poulain', 'amelie poulain'),
+            ('AMÉLIE POULAIN', 'amelie poulain'),
+            ('Åsa Söderström', 'asa soderstrom'),
+            ('Straße', 'strasse'),
+            ('Drama', 'drama'),
+        ],
+    )
+    def test_fold_name_removes_case_and_accents(self, name, key):
+        assert models.fold_name(name) == key
@@ -297,4 +297,61 @@ class TestMovieNormalizer:
             if elt.startswith('transform')
         ]
         for func in normalizers:
-            assert func in norm.MovieNormalizer.normalizers
\ No newline at end of file
+            assert func in norm.MovieNormalizer.normalizers
+
+    @pytest.mark.parametrize(
+        'changes',
+        [
+            {},
+            {'year': 'TV Movie 2019', 'date_published': '2019'},
+            {'metascore': '', 'rated': '', 'image_url': '', 'votes': '7'},
+            {'long_description': '  ', 'genres': '', 'actors': ' '},
+            {'budget': 'EUR 12345', 'usa_gross_income': '$ 1000'},
+            {'budget': '12345', 'worldwide_gross_income': 'abc'},
+            {'budget': '$', 'reviews_from_users': '12.0'},
+            {'budget': 'abcd 12345', 'reviews_from_critics': ''},
+            {'budget': '    12', 'production_company': 'Fox'},
+            {'budget': '', 'imdb_title_id': 'tt9914942'},
+        ],
+    )
+    def test_normalize_batch_gives_same_results_as_normalize(self, changes):
+        """Verifies that given a list of raw movies, normalize_batch produces
+        the same values as normalize called on each movie."""
+        raw = {
+            'imdb_title_id': 'tt0000009',
+            'title': 'Miss Jerry',
+            'year': '1894',
+            'date_published': '1894-10-09',
+            'genres': 'Romance',
+            'duration': '45',
+            'countries': 'USA',
+            'languages': 'None',
+            'directors': 'Alexander Black',
+            'writers': 'Alexander Black',
+            'production_company': 'Alexander Black Photoplays',
+            'actors': 'Blanche Bayliss, William Courtenay',
+            'description': 'The adventures of a female reporter.',
+            'avg_vote': '5.9',
+            'votes': '154',
+            'budget': '$ 250',
+            'usa_gross_income': '',
+            'worldwide_gross_income': '',
+            'metascore': '83.0',
+            'reviews_from_users': '1.0',
+            'reviews_from_critics': '2.0',
+            'rated': 'PG',
+            'long_description': 'Jerry is a reporter.',
+            'image_url': 'https://example.com/poster.jpg',
+            'imdb_score': '6.0',
+        }
+        movies = [dict(raw), dict(raw, **changes)]
+        expected = [dict(movie) for movie in movies]
+        movie_normalizer = norm.MovieNormalizer()
+        movie_normalizer.normalize_all(expected)
+        movie_normalizer.normalize_batch(movies)
+        assert movies == expected
+
+    def test_normalize_batch_accepts_empty_list(self):
+        movies = []
+        norm.MovieNormalizer().normalize_batch(movies)
+        assert movies == []
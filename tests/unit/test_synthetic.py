@@ -0,0 +1,48 @@
+import csv
+from io import TextIOWrapper
+from zipfile import ZipFile
+
+from movies import synthetic
+from movies.normalizers import MovieNormalizer
+
+
+def _read(path):
+    with ZipFile(path) as zf:
+        with zf.open('movies.csv') as infile:
+            return list(csv.DictReader(TextIOWrapper(infile, 'utf-8')))
+
+
+class TestGenerateMoviesCsv:
+    """Tests the synthetic movies csv generator."""
+
+    def test_generate_movies_csv_writes_requested_rows(self, tmp_path):
+        path = tmp_path / 'movies.csv.zip'
+        synthetic.generate_movies_csv(path, 100)
+        rows = _read(path)
+        assert len(rows) == 100
+        assert list(rows[0]) == synthetic.COLUMNS
+        assert len({row['imdb_title_id'] for row in rows}) == 100
+
+    def test_generate_movies_csv_is_deterministic(self, tmp_path):
+        first, second = tmp_path / 'first.zip', tmp_path / 'second.zip'
+        synthetic.generate_movies_csv(first, 50, seed=1)
+        synthetic.generate_movies_csv(second, 50, seed=1)
+        assert _read(first) == _read(second)
+
+    def test_generate_movies_csv_rows_can_be_normalized(self, tmp_path):
+        path = tmp_path / 'movies.csv.zip'
+        synthetic.generate_movies_csv(path, 200)
+        rows = _read(path)
+        MovieNormalizer().normalize_batch(rows)
+        assert [row['id'] for row in rows] == list(range(1, 201))
+
+    def test_generate_movies_csv_skews_name_frequencies(self, tmp_path):
+        """Verifies that a few genres are very frequent while there are many
+        distinct actors, as in the IMDb data."""
+        path = tmp_path / 'movies.csv.zip'
+        synthetic.generate_movies_csv(path, 500)
+        rows = _read(path)
+        genres = [g for row in rows for g in row['genres'].split(', ')]
+        actors = [a for row in rows for a in row['actors'].split(', ')]
+        assert genres.count('Drama') > len(genres) / 10
+        assert len(set(actors)) > len(actors) / 5